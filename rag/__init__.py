@@ -3,8 +3,17 @@
 RAG package for KEITH Manufacturing Handbook AI Assistant.
 """
 
-from .pdf import extract_pdf_chunks, HANDBOOK_PAGES
-from .embeddings import get_embeddings, get_single_embedding
+from .pdf import extract_pdf_chunks, extract_pdf_pages, HANDBOOK_PAGES
+from .chunk_store import ChunkStore, ChunkView, get_chunk_store, set_chunk_store
+from .embeddings import (
+    get_embeddings,
+    get_single_embedding,
+    EmbeddingProvider,
+    OpenAIEmbeddingProvider,
+    HashedNgramProvider,
+    get_embedding_provider,
+    set_embedding_provider
+)
 from .pinecone_store import (
     init_pinecone,
     create_index_if_not_exists,
@@ -13,21 +22,61 @@ from .pinecone_store import (
     clear_namespace,
     get_namespace_count
 )
-from .indexer import check_index_exists, index_handbook
+from .ratelimit import (
+    RateLimitScheduler,
+    get_scheduler,
+    configure_scheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND
+)
+from .singleflight import SingleFlight
+from .normalize import normalize_question
+from .ingest import ingest_chunks
+from .indexer import (
+    check_index_exists,
+    index_handbook,
+    index_fingerprint,
+    versioned_namespace
+)
 from .agent import AgenticRAG
+from .memory import ConversationMemory
+from .warmup import start_warmup, warmup_stage
 
 __all__ = [
     "extract_pdf_chunks",
+    "extract_pdf_pages",
     "HANDBOOK_PAGES",
+    "ChunkStore",
+    "ChunkView",
+    "get_chunk_store",
+    "set_chunk_store",
     "get_embeddings",
     "get_single_embedding",
+    "EmbeddingProvider",
+    "OpenAIEmbeddingProvider",
+    "HashedNgramProvider",
+    "get_embedding_provider",
+    "set_embedding_provider",
     "init_pinecone",
     "create_index_if_not_exists",
     "upsert_chunks",
     "query_similar",
     "clear_namespace",
     "get_namespace_count",
+    "RateLimitScheduler",
+    "get_scheduler",
+    "configure_scheduler",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND",
+    "SingleFlight",
+    "normalize_question",
+    "ingest_chunks",
     "check_index_exists",
     "index_handbook",
-    "AgenticRAG"
+    "index_fingerprint",
+    "versioned_namespace",
+    "AgenticRAG",
+    "ConversationMemory",
+    "start_warmup",
+    "warmup_stage"
 ]
@@ -4,27 +4,136 @@ Agentic RAG orchestration for KEITH Manufacturing Handbook.
 PLAN → SEARCH → EVALUATE → ANSWER → SELF-CRITIQUE
 """
 
+import copy
+import functools
 import json
 import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional, Callable, List, Dict
+import openai
 from openai import OpenAI
 
+from .chunk_store import get_chunk_store
 from .embeddings import get_single_embedding
 from .pinecone_store import init_pinecone, query_similar
+from .confidence import ConfidenceGate, retrieval_features
+from .deadline import Deadline
+from .intent import CANNED_RESPONSES, HANDBOOK, IntentClassifier
+from .local_index import QuantizedIndex
+from .memory import ConversationMemory
+from .normalize import normalize_question
+from .precomputed import PrecomputedAnswers
+from .query_log import QueryLog, get_query_log, log_row
+from .ratelimit import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, estimate_tokens, get_scheduler
+from .singleflight import SingleFlight
+from .tiering import ModelTierPolicy
+from .topics import TOPIC_TAGS, normalize_topics
+from .verifier import Verification, verify_answer
+from .llm_cache import LLMCache, cache_key, get_llm_cache
 from .prompts import (
     PLANNER_SYSTEM_PROMPT,
     EVALUATOR_SYSTEM_PROMPT,
+    EVALUATOR_DELTA_PROMPT,
     ANSWER_SYSTEM_PROMPT,
     CRITIQUE_SYSTEM_PROMPT,
+    SUMMARY_SYSTEM_PROMPT,
     format_chunks_for_prompt,
-    format_chunks_for_evaluation
+    format_chunks_for_evaluation,
+    format_evaluation_summary
 )
 
-# Use GPT-4o for best results
+# Use GPT-4o for the final answer; other stages are tiered (see rag.tiering)
 OPENAI_CHAT_MODEL = "gpt-4o"
 TOP_K_RESULTS = 5
+# A topic-filtered search weaker than this is repeated without the filter
+MIN_FILTERED_RESULTS = 3
+# Drop the topic filter when the whole handbook's best match beats the filtered one by this much
+FILTER_SCORE_MARGIN = 0.03
 MAX_AGENT_ITERATIONS = 2
 
+# Process-wide: identical questions asked concurrently share one pipeline run
+_inflight = SingleFlight()
+
+# Async critique mode: reviews run here and are looked up by review_id
+CRITIQUE_MODES = ("sync", "async")
+MAX_TRACKED_REVIEWS = 256
+_review_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-review")
+_reviews: "OrderedDict[str, Future]" = OrderedDict()
+_reviews_lock = threading.Lock()
+
+
+def _track_review(future: Future) -> str:
+    review_id = uuid.uuid4().hex
+    with _reviews_lock:
+        _reviews[review_id] = future
+        while len(_reviews) > MAX_TRACKED_REVIEWS:
+            _reviews.popitem(last=False)
+    return review_id
+
+
+def on_review(review_id: str, callback: Callable[[Dict], None]) -> bool:
+    """
+    Call `callback(update)` when the background review `review_id` finishes.
+    
+    The update has "review_id" and "amended" (bool), plus "answer" and "reasoning_steps"
+    when the critique asked for a revision. Runs on the review thread (or
+    immediately if already done). Returns False for unknown/expired ids.
+    """
+    with _reviews_lock:
+        future = _reviews.get(review_id)
+    if future is None:
+        return False
+    future.add_done_callback(lambda f: callback({**f.result(), "review_id": review_id}))
+    return True
+
+
+# Speculative mode: answers are drafted here while the evaluator runs
+# One draft per concurrent request (rag.server runs 8 answer workers by default);
+# a draft still queued when the verdict arrives is cancelled and written inline
+DRAFT_WORKERS = 8
+_draft_executor = ThreadPoolExecutor(max_workers=DRAFT_WORKERS, thread_name_prefix="rag-draft")
+
+
+class SpeculationStats:
+    """Process-wide outcomes of speculative drafts (thread-safe)."""
+    
+    # kept: the verdict was sufficient; discarded: a re-search changed the context
+    # after the draft's LLM call started; cancelled: the context changed before it
+    # started; unstarted: the verdict arrived before a draft worker was free
+    OUTCOMES = ("kept", "discarded", "cancelled", "unstarted")
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {outcome: 0 for outcome in self.OUTCOMES}
+        self._wasted_seconds = 0.0
+    
+    def record(self, outcome: str, wasted_seconds: float = 0.0):
+        with self._lock:
+            self._counts[outcome] += 1
+            self._wasted_seconds += wasted_seconds
+    
+    def snapshot(self) -> Dict:
+        """Counts per outcome, the share of drafts not kept and seconds spent on discarded ones."""
+        with self._lock:
+            drafts = sum(self._counts.values())
+            wasted = drafts - self._counts["kept"]
+            return {
+                **self._counts,
+                "wasted_share": wasted / drafts if drafts else 0.0,
+                "wasted_seconds": self._wasted_seconds,
+            }
+
+
+_speculation = SpeculationStats()
+
+
+def speculation_stats() -> Dict:
+    return _speculation.snapshot()
+
 
 def parse_json_response(response: str) -> Optional[Dict]:
     """Safely parse JSON from LLM response."""
@@ -47,8 +156,65 @@ def parse_json_response(response: str) -> Optional[Dict]:
         return None
 
 
+def filter_is_weak(filtered: List[Dict], unfiltered: List[Dict], min_results: int) -> bool:
+    """
+    True if a topic-filtered search should give way to the unfiltered one.
+    
+    The comparison is relative: absolute cosine scores vary too much between
+    embedding models for a fixed floor to mean anything.
+    """
+    if len(filtered) < min_results:
+        return True
+    if not unfiltered:
+        return False
+    return unfiltered[0].get("score", 0) - filtered[0].get("score", 0) > FILTER_SCORE_MARGIN
+
+
+def _timed_stage(stage: str):
+    """Accumulate a stage method's wall time into the current answer's timings."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._record_timing(stage, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class EvaluationState:
+    """What the evaluator has already judged during one request."""
+    
+    # format_chunks_for_evaluation only shows the evaluator the top 5
+    WINDOW = 5
+    
+    def __init__(self):
+        self.judged_ids: set = set()
+        self.judged: List[Dict] = []
+        self.verdict: Optional[Dict] = None
+    
+    def unseen(self, results: List[Dict]) -> List[Dict]:
+        return [
+            r for r in results[:self.WINDOW]
+            if r.get("chunk_id", r.get("id", "")) not in self.judged_ids
+        ]
+    
+    def record(self, chunks: List[Dict], verdict: Dict):
+        for r in chunks:
+            self.judged_ids.add(r.get("chunk_id", r.get("id", "")))
+            self.judged.append(r)
+        self.verdict = verdict
+
+
 class AgenticRAG:
-    """Agentic RAG system for KEITH Manufacturing Handbook Q&A."""
+    """
+    Agentic RAG system for KEITH Manufacturing Handbook Q&A.
+    
+    Safe to share across threads: per-question state lives in thread-local
+    storage and progress goes to the per-call status_callback.
+    """
     
     def __init__(
         self,
@@ -58,7 +224,25 @@ class AgenticRAG:
         namespace: str,
         top_k: int = TOP_K_RESULTS,
         chat_model: str = OPENAI_CHAT_MODEL,
-        status_callback: Optional[Callable[[str], None]] = None
+        status_callback: Optional[Callable[[str], None]] = None,
+        coalesce: bool = True,
+        local_index: Optional[QuantizedIndex] = None,
+        use_confidence_gate: bool = True,
+        confidence_gate: Optional[ConfidenceGate] = None,
+        use_intent_detection: bool = True,
+        intent_classifier: Optional[IntentClassifier] = None,
+        stage_models: Optional[Dict[str, str]] = None,
+        stage_timeouts: Optional[Dict[str, float]] = None,
+        latency_budget: Optional[float] = None,
+        critique_mode: str = "sync",
+        use_llm_cache: bool = True,
+        llm_cache: Optional[LLMCache] = None,
+        precomputed: Optional[PrecomputedAnswers] = None,
+        use_query_log: bool = True,
+        query_log: Optional[QueryLog] = None,
+        use_verifier: bool = True,
+        speculative: bool = False,
+        priority: int = PRIORITY_INTERACTIVE
     ):
         self.openai_api_key = openai_api_key
         self.pinecone_api_key = pinecone_api_key
@@ -66,16 +250,85 @@ class AgenticRAG:
         self.namespace = namespace
         self.top_k = top_k
         self.chat_model = chat_model
+        self.tier_policy = ModelTierPolicy(
+            stage_models={"answer": chat_model, **(stage_models or {})},
+            stage_timeouts=stage_timeouts
+        )
         self.status_callback = status_callback
+        self.coalesce = coalesce
+        self.local_index = local_index
+        self.latency_budget = latency_budget
+        if critique_mode not in CRITIQUE_MODES:
+            raise ValueError(f"critique_mode must be one of {CRITIQUE_MODES}")
+        self.critique_mode = critique_mode
+        self.use_verifier = use_verifier
+        self.speculative = speculative
+        # Rate-limit priority of this agent's calls (PRIORITY_BACKGROUND for warming jobs)
+        self.priority = priority
+        self.confidence_gate = None
+        if use_confidence_gate:
+            self.confidence_gate = confidence_gate or ConfidenceGate.from_env()
+        self.intent_classifier = None
+        if use_intent_detection:
+            self.intent_classifier = intent_classifier or IntentClassifier.from_env()
+        self.llm_cache = None
+        if use_llm_cache:
+            self.llm_cache = llm_cache or get_llm_cache()
+        self.precomputed = precomputed
+        self.query_log = None
+        if use_query_log:
+            self.query_log = query_log or get_query_log()
         
-        self.openai_client = OpenAI(api_key=openai_api_key)
+        # Retries are owned by the shared rate-limit scheduler, not the SDK
+        self.openai_client = OpenAI(api_key=openai_api_key, max_retries=0)
         init_pinecone(pinecone_api_key)
         
-        self.reasoning_steps = []
+        # Per-call state is thread-local so one agent can serve many sessions
+        self._local = threading.local()
+    
+    @property
+    def reasoning_steps(self) -> List[Dict]:
+        """Reasoning steps of the most recent answer() on this thread."""
+        if not hasattr(self._local, "reasoning_steps"):
+            self._local.reasoning_steps = []
+        return self._local.reasoning_steps
+    
+    @reasoning_steps.setter
+    def reasoning_steps(self, steps: List[Dict]):
+        self._local.reasoning_steps = steps
+    
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Per-stage seconds of the most recent answer() on this thread."""
+        if not hasattr(self._local, "timings"):
+            self._local.timings = {}
+        return self._local.timings
+    
+    def _record_timing(self, stage: str, seconds: float):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+    
+    @property
+    def _deadline(self) -> Deadline:
+        if not hasattr(self._local, "deadline"):
+            self._local.deadline = Deadline()
+        return self._local.deadline
+    
+    def _skip_stage(self, stage: str):
+        """Record an optional stage dropped to stay within the latency budget."""
+        self._local.skipped.append(stage)
+        self._add_reasoning("Skipped", f"Skipping {stage} to stay within the {self._deadline.budget:.0f}s time budget")
+    
+    @property
+    def _progress(self) -> Optional[Callable[[str], None]]:
+        return getattr(self._local, "progress", self.status_callback)
+    
+    @_progress.setter
+    def _progress(self, callback: Optional[Callable[[str], None]]):
+        self._local.progress = callback
     
     def _update_status(self, message: str):
-        if self.status_callback:
-            self.status_callback(message)
+        if self._progress:
+            self._progress(message)
     
     def _add_reasoning(self, step: str, detail: str):
         self.reasoning_steps.append({
@@ -88,68 +341,190 @@ class AgenticRAG:
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.3,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        priority: Optional[int] = None,
+        stage: str = "answer"
     ) -> str:
-        response = self.openai_client.chat.completions.create(
-            model=self.chat_model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content
+        """
+        Chat completion for one pipeline stage.
+        
+        Tries the stage's model with its timeout, then the fast tier if that
+        times out. Latencies feed the shared tracker the policy adapts on.
+        Every timeout is capped by the time left in the request's budget.
+        JSON stages are answered from the LLM cache when an attempt's model
+        has already seen the exact same messages.
+        """
+        priority = self.priority if priority is None else priority
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        tracker = self.tier_policy.tracker
+        attempts = self.tier_policy.attempts(stage)
+        deadline = self._deadline
+        
+        cache = self.llm_cache if self.llm_cache is not None and self.llm_cache.caches(stage) else None
+        if cache is not None:
+            cached = cache.get_any(stage, [cache_key(model, temperature, messages) for model, _ in attempts])
+            if cached is not None:
+                self._count_llm_call(cached=True)
+                return cached
+        
+        for i, (model, timeout) in enumerate(attempts):
+            timeout = deadline.timeout(timeout)
+            # Latency of the API request alone; rate-limit queueing and backoff are not the model's
+            request_seconds = [0.0]
+            
+            def create(model=model, timeout=timeout):
+                started = time.perf_counter()
+                try:
+                    return self.openai_client.chat.completions.with_raw_response.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=timeout
+                    )
+                finally:
+                    request_seconds[0] = time.perf_counter() - started
+            
+            try:
+                scheduler = get_scheduler()
+                raw = scheduler.call(
+                    model,
+                    create,
+                    tokens=prompt_tokens + scheduler.completion_estimate(model, max_tokens),
+                    priority=priority,
+                    timeout=deadline.remaining(),
+                    retry_timeouts=i == len(attempts) - 1
+                )
+            except openai.APITimeoutError:
+                tracker.record(model, request_seconds[0], timed_out=True)
+                if i == len(attempts) - 1:
+                    raise
+                self._add_reasoning("Fallback", f"{stage} timed out on {model} after {timeout:.0f}s - retrying on a faster model")
+                continue
+            
+            tracker.record(model, request_seconds[0])
+            self._count_llm_call(cached=False)
+            content = raw.parse().choices[0].message.content
+            if cache is not None and parse_json_response(content):
+                cache.put(stage, cache_key(model, temperature, messages), content)
+            return content
+    
+    def _count_llm_call(self, cached: bool):
+        counts = getattr(self._local, "llm_calls", None)
+        if counts is None:
+            counts = self._local.llm_calls = [0, 0]
+        counts[0] += 1
+        counts[1] += int(cached)
     
-    def _plan_search(self, question: str) -> Dict:
+    def _detect_intent(self, question: str, is_follow_up: bool) -> str:
+        """Local small-talk / off-topic check; HANDBOOK means run the full pipeline."""
+        if self.intent_classifier is None:
+            return HANDBOOK
+        intent = self.intent_classifier.classify(question, allow_off_topic=not is_follow_up)
+        if intent != HANDBOOK:
+            self._add_reasoning("Intent", f"Detected {intent.replace('_', '-')} - answering without search")
+        return intent
+    
+    def _direct_plan(self, question: str) -> Dict:
+        """Plan used when the planner fails or is skipped: search the question as-is."""
+        return {
+            "question_type": "simple",
+            "sub_questions": [question],
+            "search_terms": question.split()[:5],
+            "requires_calculation": False,
+            "reasoning": "Using direct search",
+            "standalone_question": question,
+            "same_topic": False,
+            "topics": []
+        }
+    
+    @_timed_stage("planning")
+    def _plan_search(self, question: str, conversation: str = "") -> Dict:
         self._add_reasoning("Planning", "Analyzing question to create search strategy...")
         
         messages = [
             {"role": "system", "content": "You are a planning agent. Respond only with valid JSON."},
-            {"role": "user", "content": PLANNER_SYSTEM_PROMPT.format(question=question)}
+            {"role": "user", "content": PLANNER_SYSTEM_PROMPT.format(
+                question=question,
+                conversation=conversation or "(none - this is the first question)",
+                topics=", ".join(TOPIC_TAGS)
+            )}
         ]
         
-        response = self._call_openai_chat(messages, temperature=0.2, max_tokens=500)
-        plan = parse_json_response(response)
-        
-        if not plan:
-            plan = {
-                "question_type": "simple",
-                "sub_questions": [question],
-                "search_terms": question.split()[:5],
-                "requires_calculation": False,
-                "reasoning": "Using direct search"
-            }
+        response = self._call_openai_chat(messages, temperature=0.2, max_tokens=500, stage="planner")
+        plan = parse_json_response(response) or self._direct_plan(question)
+        plan["topics"] = normalize_topics(plan.get("topics") or [])
         
         self._add_reasoning("Plan Created", plan.get("reasoning", "Direct search"))
         return plan
     
-    def _search(self, query: str) -> List[Dict]:
-        self._add_reasoning("Searching", f"Query: '{query[:50]}...'")
-        
-        embedding = get_single_embedding(query, self.openai_api_key)
-        results = query_similar(
+    def _query_index(self, embedding: List[float], topics: Optional[List[str]] = None) -> List[Dict]:
+        if self.local_index is not None:
+            return self.local_index.query(embedding, top_k=self.top_k, topics=topics)
+        return query_similar(
             self.index_name,
             embedding,
             self.namespace,
             top_k=self.top_k,
-            include_metadata=True
+            include_metadata=True,
+            topics=topics
         )
+    
+    @_timed_stage("search")
+    def _search(self, query: str, topics: Optional[List[str]] = None) -> List[Dict]:
+        """Vector search, restricted to `topics` unless the whole handbook matches clearly better."""
+        self._add_reasoning("Searching", f"Query: '{query[:50]}...'")
+        
+        embedding = get_single_embedding(query, self.openai_api_key, priority=self.priority)
+        results = self._query_index(embedding, topics)
+        if topics:
+            unfiltered = self._query_index(embedding)
+            if filter_is_weak(results, unfiltered, min(MIN_FILTERED_RESULTS, self.top_k)):
+                self._add_reasoning("Filter Fallback", f"Better matches outside {', '.join(topics)} - searching all sections")
+                results = unfiltered
         
         self._add_reasoning("Results", f"Found {len(results)} relevant sections")
         return results
     
-    def _evaluate_results(self, question: str, results: List[Dict]) -> Dict:
-        self._add_reasoning("Evaluating", "Checking if results are sufficient...")
-        
-        results_text = format_chunks_for_evaluation(results)
+    @_timed_stage("evaluation")
+    def _evaluate_results(
+        self,
+        question: str,
+        results: List[Dict],
+        state: Optional[EvaluationState] = None
+    ) -> Dict:
+        """
+        Judge whether results suffice. With `state` from an earlier call in
+        the same request, only chunks not judged before are sent, together
+        with a recap of the previous verdict.
+        """
+        if state is not None and state.verdict is not None:
+            new_chunks = state.unseen(results)
+            if not new_chunks:
+                # The re-search surfaced nothing new; repeating it would not help either
+                self._add_reasoning("Evaluation", "No new results since the last evaluation")
+                return {**state.verdict, "suggested_search": None}
+            
+            self._add_reasoning("Evaluating", f"Checking {len(new_chunks)} new results...")
+            prompt = EVALUATOR_DELTA_PROMPT.format(
+                question=question,
+                previous=format_evaluation_summary(state.verdict, state.judged),
+                results=format_chunks_for_evaluation(new_chunks)
+            )
+        else:
+            self._add_reasoning("Evaluating", "Checking if results are sufficient...")
+            new_chunks = results[:EvaluationState.WINDOW]
+            prompt = EVALUATOR_SYSTEM_PROMPT.format(
+                question=question,
+                results=format_chunks_for_evaluation(results)
+            )
         
         messages = [
             {"role": "system", "content": "You evaluate search results. Respond only with valid JSON."},
-            {"role": "user", "content": EVALUATOR_SYSTEM_PROMPT.format(
-                question=question,
-                results=results_text
-            )}
+            {"role": "user", "content": prompt}
         ]
         
-        response = self._call_openai_chat(messages, temperature=0.2, max_tokens=300)
+        response = self._call_openai_chat(messages, temperature=0.2, max_tokens=300, stage="evaluator")
         evaluation = parse_json_response(response)
         
         if not evaluation:
@@ -161,8 +536,32 @@ class AgenticRAG:
             f"Sufficient: {evaluation.get('sufficient')}, Confidence: {confidence:.0%}"
         )
         
+        if state is not None:
+            state.record(new_chunks, evaluation)
         return evaluation
     
+    def _gate_evaluation(
+        self,
+        per_query_results: List[List[Dict]],
+        top_results: List[Dict],
+        plan: Dict
+    ) -> Optional[Dict]:
+        """Return a local "sufficient" verdict when the gate opens, else None."""
+        if self.confidence_gate is None or not per_query_results:
+            return None
+        
+        features = retrieval_features(per_query_results, top_results, plan.get("search_terms") or [])
+        if not self.confidence_gate.is_confident(features):
+            return None
+        
+        self._add_reasoning(
+            "Evaluation",
+            f"High retrieval confidence (top {features['top_score']:.2f}, "
+            f"margin {features['margin']:.2f}) - skipping evaluator"
+        )
+        return {"sufficient": True, "confidence": features["top_score"], "missing_info": None, "gated": True}
+    
+    @_timed_stage("generation")
     def _generate_answer(self, question: str, context: List[Dict], reasoning: str) -> str:
         self._add_reasoning("Generating", "Creating comprehensive answer...")
         
@@ -177,27 +576,44 @@ class AgenticRAG:
             )}
         ]
         
-        answer = self._call_openai_chat(messages, temperature=0.4, max_tokens=2000)
+        answer = self._call_openai_chat(messages, temperature=0.4, max_tokens=2000, stage="answer")
         return answer
     
-    def _self_critique(self, question: str, context: List[Dict], answer: str) -> Dict:
+    def _verify_answer(self, question: str, context: List[Dict], answer: str) -> Optional[Verification]:
+        """Local number and citation check; None when the verifier is disabled."""
+        if not self.use_verifier:
+            return None
+        verification = verify_answer(answer, context, question)
+        if verification.ok:
+            self._add_reasoning("Verified", f"{verification.checked} numbers and citations match the handbook")
+        else:
+            self._add_reasoning("Verification Flags", "; ".join(verification.issues[:3]))
+        return verification
+    
+    @_timed_stage("critique")
+    def _self_critique(
+        self,
+        question: str,
+        context: List[Dict],
+        answer: str,
+        flags: Optional[List[str]] = None
+    ) -> Dict:
         self._add_reasoning("Self-Critique", "Reviewing answer for accuracy...")
         
-        context_text = "\n\n".join([
-            f"[Page {c.get('page_number', '?')}] {c.get('text', '')[:300]}..." 
-            for c in context[:3]
-        ])
+        # Only suspicious answers get here, so the reviewer sees the same chunks the answer did
+        context_text = format_chunks_for_prompt(context[:TOP_K_RESULTS])
         
         messages = [
             {"role": "system", "content": "You review answers for accuracy. Respond only with valid JSON."},
             {"role": "user", "content": CRITIQUE_SYSTEM_PROMPT.format(
                 question=question,
                 context=context_text,
-                answer=answer
+                answer=answer,
+                flags="\n".join(f"- {flag}" for flag in flags) if flags else "(none)"
             )}
         ]
         
-        response = self._call_openai_chat(messages, temperature=0.2, max_tokens=400)
+        response = self._call_openai_chat(messages, temperature=0.2, max_tokens=400, stage="critique")
         critique = parse_json_response(response)
         
         if not critique:
@@ -206,53 +622,388 @@ class AgenticRAG:
         self._add_reasoning("Critique Result", critique.get("final_verdict", "approve"))
         return critique
     
-    def answer(self, question: str) -> dict:
-        """Main entry point: Answer a question using the agentic loop."""
+    @_timed_stage("summarize")
+    def _summarize_turn(self, summary: str, turn: str) -> str:
+        """Fold one evicted conversation turn into the running summary."""
+        messages = [
+            {"role": "system", "content": "You summarize conversations concisely."},
+            {"role": "user", "content": SUMMARY_SYSTEM_PROMPT.format(
+                summary=summary or "(empty)",
+                turn=turn,
+                max_words=150
+            )}
+        ]
+        return self._call_openai_chat(
+            messages, temperature=0.2, max_tokens=300, priority=PRIORITY_BACKGROUND, stage="summary"
+        ).strip()
+    
+    def _compact_in_background(self, memory: ConversationMemory):
+        """Summarize turns evicted from `memory` after the answer was returned."""
+        # Fresh per-thread state: this runs on a review worker, not the request thread
+        self.reasoning_steps = []
+        self._local.timings = {}
+        self._local.deadline = Deadline()
+        self._local.skipped = []
+        self._local.llm_calls = [0, 0]
+        self._progress = None
+        memory.compact(self._summarize_turn)
+    
+    def _review_in_background(
+        self,
+        question: str,
+        context: List[Dict],
+        answer: str,
+        reasoning_summary: str,
+        flags: Optional[List[str]] = None
+    ) -> Dict:
+        """Critique (and possibly revise) an answer already returned to the user."""
+        # Fresh per-thread state: this runs on a review worker, not the request thread
+        self.reasoning_steps = []
+        self._local.timings = {}
+        self._local.deadline = Deadline()
+        self._local.skipped = []
+        self._local.llm_calls = [0, 0]
+        self._progress = None
+        
+        try:
+            critique = self._self_critique(question, context, answer, flags)
+            if critique.get("final_verdict") != "revise" or not critique.get("improvements"):
+                return {"amended": False, "critique": critique}
+            
+            self._add_reasoning("Revision", critique.get("improvements", "Minor improvements"))
+            enhanced_reasoning = reasoning_summary + f"\n- Improvement needed: {critique.get('improvements')}"
+            return {
+                "amended": True,
+                "answer": self._generate_answer(question, context, enhanced_reasoning),
+                "critique": critique,
+                "reasoning_steps": self.reasoning_steps
+            }
+        except Exception as e:
+            return {"amended": False, "error": str(e)}
+    
+    def _draft_in_background(
+        self,
+        question: str,
+        context: List[Dict],
+        reasoning: str,
+        deadline: Deadline
+    ) -> Dict:
+        """Generate an answer on a draft worker; state is merged back if the draft is kept."""
         self.reasoning_steps = []
+        self._local.timings = {}
+        self._local.deadline = deadline
+        self._local.skipped = []
+        self._local.llm_calls = [0, 0]
+        self._progress = None
+        
+        started = time.perf_counter()
+        answer = self._generate_answer(question, context, reasoning)
+        return {
+            "answer": answer,
+            "seconds": time.perf_counter() - started,
+            "timings": dict(self.timings),
+            "reasoning_steps": self.reasoning_steps,
+            "llm_calls": self._local.llm_calls
+        }
+    
+    def _start_draft(self, question: str, context: List[Dict]) -> tuple:
+        """Submit a speculative answer on `context`; returns (future, chunk ids drafted on)."""
+        reasoning_summary = "\n".join([
+            f"- {s['step']}: {s['description']}"
+            for s in self.reasoning_steps
+        ])
+        future = _draft_executor.submit(
+            self._draft_in_background, question, list(context), reasoning_summary, self._deadline
+        )
+        return future, [r.get("chunk_id", r.get("id", "")) for r in context]
+    
+    def _finish_draft(self, draft: tuple, context: List[Dict]) -> Optional[str]:
+        """
+        The drafted answer if it was written on `context`, else None.
+        
+        A stale draft is cancelled, or left to finish and thrown away if its
+        call already started; either way it counts as wasted speculation.
+        A draft that has not started yet is cancelled too, so the caller
+        generates inline instead of queueing behind other requests' drafts.
+        """
+        future, drafted_ids = draft
+        stale = [r.get("chunk_id", r.get("id", "")) for r in context] != drafted_ids
+        if not stale and future.cancel():
+            self._local.speculation = "unstarted"
+            _speculation.record("unstarted")
+            self._add_reasoning("Speculative Draft", "Draft had not started - generating the answer now")
+            return None
+        if stale:
+            self._local.speculation = "discarded"
+            if future.cancel():
+                _speculation.record("cancelled")
+            else:
+                future.add_done_callback(lambda f: _speculation.record(
+                    "discarded", 0.0 if f.exception() else f.result()["seconds"]
+                ))
+            self._add_reasoning("Speculative Draft", "Search was refined - discarding the draft and regenerating")
+            return None
+        
+        try:
+            drafted = future.result()
+        except Exception as e:
+            self._local.speculation = "discarded"
+            _speculation.record("discarded")
+            self._add_reasoning("Speculative Draft", f"Draft failed ({e}) - regenerating")
+            return None
+        
+        self._local.speculation = "kept"
+        _speculation.record("kept")
+        for stage, seconds in drafted["timings"].items():
+            self._record_timing(stage, seconds)
+        counts = self._local.llm_calls
+        counts[0] += drafted["llm_calls"][0]
+        counts[1] += drafted["llm_calls"][1]
+        self.reasoning_steps.extend(drafted["reasoning_steps"])
+        self._add_reasoning("Speculative Draft", "Results were sufficient - keeping the answer drafted during evaluation")
+        return drafted["answer"]
+    
+    def _precomputed_answer(self, entry: Dict):
+        """Serve an answer prepared at index time; returns (result, context_chunks)."""
+        self.reasoning_steps = []
+        self._local.timings = {}
+        self._local.deadline = Deadline()
+        self._local.skipped = []
+        self._local.llm_calls = [0, 0]
+        self._local.speculation = ""
+        self._add_reasoning("Precomputed", "Popular question - answer prepared when the handbook was indexed")
+        
+        sources = copy.deepcopy(entry["sources"])
+        context = get_chunk_store().hydrate([
+            {"chunk_id": s["chunk_id"], "score": s.get("score", 0)} for s in sources
+        ])
+        return self._result(entry["answer"], sources), context
+    
+    def _result(self, answer: str, sources: List[Dict]) -> dict:
+        timings = {stage: round(seconds, 3) for stage, seconds in self.timings.items()}
+        timings["total"] = round(self._deadline.elapsed(), 3)
+        llm_calls, llm_cache_hits = getattr(self._local, "llm_calls", (0, 0))
+        return {
+            "answer": answer,
+            "sources": sources,
+            "reasoning_steps": self.reasoning_steps,
+            "timings": timings,
+            "skipped_stages": list(self._local.skipped),
+            "llm_calls": llm_calls,
+            "llm_cache_hits": llm_cache_hits,
+            "speculation": getattr(self._local, "speculation", "")
+        }
+    
+    @staticmethod
+    def _sources(results: List[Dict]) -> List[Dict]:
+        return [
+            {
+                "page_number": r.get("page_number", 0),
+                "section_title": r.get("section_title", "Unknown"),
+                "score": r.get("score", 0),
+                "chunk_id": r.get("chunk_id", r.get("id", ""))
+            }
+            for r in results[:5]
+        ]
+    
+    def _timed_out_result(self, context: List[Dict], error: Exception) -> dict:
+        """Result when the answer call ran out of time: the retrieved sections and a retry hint."""
+        self._add_reasoning("Timed Out", f"No time left to write the answer ({error})")
+        self._update_status("")
+        pages = ", ".join(sorted({str(r.get("page_number", 0)) for r in context[:5]}, key=int))
+        result = self._result(
+            "This question took too long to answer, so I stopped before writing a reply. "
+            f"The most relevant handbook sections are on page(s) {pages}. "
+            "Please try again in a moment, or contact HR at 541-475-3802.",
+            self._sources(context)
+        )
+        result["timed_out"] = True
+        return result
+    
+    def _coalesce_key(self, question: str, budget: Optional[float]) -> Optional[str]:
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        # Followers inherit the leader's priority and deadline, so both are part of the key
+        return "|".join([
+            self.index_name, self.namespace, self.chat_model, str(self.top_k),
+            str(self.priority), str(budget), normalized
+        ])
+    
+    def answer(
+        self,
+        question: str,
+        memory: Optional[ConversationMemory] = None,
+        status_callback: Optional[Callable[[str], None]] = None,
+        latency_budget: Optional[float] = None,
+        review_callback: Optional[Callable[[Dict], None]] = None
+    ) -> dict:
+        """
+        Main entry point: Answer a question using the agentic loop.
+        
+        Concurrent identical questions (after normalization, at the same
+        priority and latency budget) attach to the run already in flight; every caller receives the status updates and
+        a copy of the shared result. Popular questions precomputed at index
+        time are answered from that store. Follow-ups that depend on
+        `memory` are never coalesced or served precomputed.
+        
+        Args:
+            question: The employee's question
+            memory: Conversation memory for this chat; updated with the new turn
+            status_callback: Per-call progress callback (defaults to the agent's)
+            latency_budget: Seconds allowed end to end (defaults to the agent's);
+                optional stages are skipped and listed in "skipped_stages"
+                when the budget runs low
+            review_callback: With critique_mode="async", receives the review
+                outcome (see on_review); the result is returned before the
+                critique runs and carries "review_pending" and "review_id"
+        """
+        progress = status_callback or self.status_callback
+        budget = latency_budget if latency_budget is not None else self.latency_budget
+        standalone = memory is None or memory.is_empty()
+        hit = self.precomputed.lookup(question) if self.precomputed is not None and standalone else None
+        key = None
+        if self.coalesce and standalone:
+            key = self._coalesce_key(question, budget)
+        
+        shared = False
+        if hit is not None:
+            result, context = self._precomputed_answer(hit)
+        elif key is None:
+            result, context = self._answer(question, progress, memory, budget)
+        else:
+            (result, context), shared = _inflight.do(
+                key,
+                lambda emit: self._answer(question, emit, budget=budget),
+                on_progress=progress
+            )
+            if shared:
+                result = copy.deepcopy(result)
+                self.reasoning_steps = result["reasoning_steps"]
+        
+        if memory is not None:
+            memory.record_turn(question, result["answer"], results=context)
+            if memory.needs_compaction():
+                _review_executor.submit(self._compact_in_background, memory)
+        if review_callback is not None and result.get("review_id"):
+            on_review(result["review_id"], review_callback)
+        if self.query_log is not None:
+            self.query_log.record(log_row(
+                question, normalize_question(question), result,
+                follow_up=not standalone, coalesced=shared
+            ))
+            if result.get("review_id"):
+                # Registered after the row is queued, so the update always lands on it
+                log = self.query_log
+                on_review(result["review_id"], lambda update: log.record_review(
+                    update["review_id"], update.get("amended", False)
+                ))
+        return result
+    
+    def _answer(
+        self,
+        question: str,
+        progress: Optional[Callable[[str], None]],
+        memory: Optional[ConversationMemory] = None,
+        budget: Optional[float] = None
+    ) -> tuple:
+        """
+        Run the full PLAN → SEARCH → EVALUATE → ANSWER → CRITIQUE pipeline.
+        
+        Returns:
+            (result, context) where context is the list of chunks the answer used
+        """
+        self._progress = progress
+        self.reasoning_steps = []
+        self._local.timings = {}
+        self._local.deadline = Deadline(budget)
+        self._local.skipped = []
+        self._local.llm_calls = [0, 0]
+        self._local.speculation = ""
+        deadline = self._local.deadline
+        draft = None
         all_results = []
+        per_query_results = []
         seen_ids = set()
+        conversation = memory.context() if memory is not None else ""
         
         try:
-            # Step 1: Plan
-            self._update_status("🧠 Planning search strategy...")
-            plan = self._plan_search(question)
+            # Step 0: Greetings, thanks and off-topic questions never reach the LLM
+            intent = self._detect_intent(question, bool(conversation))
+            if intent != HANDBOOK:
+                self._add_reasoning("Complete", "Answer ready")
+                return self._result(CANNED_RESPONSES[intent], []), []
+            
+            # Step 1: Plan (a tight budget searches the question directly)
+            if conversation or deadline.allows("planning", "evaluation"):
+                self._update_status("🧠 Planning search strategy...")
+                plan = self._plan_search(question, conversation)
+            else:
+                self._skip_stage("planning")
+                plan = self._direct_plan(question)
             
             if plan.get("question_type") == "clarification_needed":
-                return {
-                    "answer": "I need more details to answer your question. Could you please be more specific about what you'd like to know from the handbook?",
-                    "sources": [],
-                    "reasoning_steps": self.reasoning_steps
-                }
+                return self._result(
+                    "I need more details to answer your question. Could you please be more specific about what you'd like to know from the handbook?",
+                    []
+                ), []
             
-            # Step 2: Search
-            search_queries = plan.get("sub_questions", [question])
-            if not search_queries:
-                search_queries = [question]
+            # Follow-ups are planned, evaluated and answered in standalone form
+            if conversation:
+                question = plan.get("standalone_question") or question
             
-            for i, query in enumerate(search_queries[:3]):
-                self._update_status(f"🔍 Searching ({i+1}/{len(search_queries[:3])})...")
-                results = self._search(query)
+            # Step 2: Search (same-topic follow-ups start from the previous turn's sections)
+            if conversation and plan.get("same_topic") and memory.last_results:
+                self._add_reasoning(
+                    "Reusing Context",
+                    f"Follow-up on the same topic - reusing {len(memory.last_results)} sections from the previous answer"
+                )
+                for r in memory.last_results:
+                    seen_ids.add(r.get("chunk_id", r.get("id", "")))
+                    all_results.append(dict(r))
+            else:
+                search_queries = plan.get("sub_questions", [question])
+                if not search_queries:
+                    search_queries = [question]
+                topics = plan.get("topics") or []
+                if topics:
+                    self._add_reasoning("Topic Filter", f"Searching within: {', '.join(topics)}")
                 
-                for r in results:
-                    chunk_id = r.get("chunk_id", r.get("id", ""))
-                    if chunk_id not in seen_ids:
-                        seen_ids.add(chunk_id)
-                        all_results.append(r)
+                for i, query in enumerate(search_queries[:3]):
+                    self._update_status(f"🔍 Searching ({i+1}/{len(search_queries[:3])})...")
+                    results = self._search(query, topics)
+                    per_query_results.append(results)
+                    
+                    for r in results:
+                        chunk_id = r.get("chunk_id", r.get("id", ""))
+                        if chunk_id not in seen_ids:
+                            seen_ids.add(chunk_id)
+                            all_results.append(r)
             
             all_results.sort(key=lambda x: x.get('score', 0), reverse=True)
             top_results = all_results[:8]
             
             if not top_results:
                 self._add_reasoning("Complete", "No relevant content found")
-                return {
-                    "answer": "I couldn't find relevant information in the KEITH Employee Handbook to answer your question. Please try rephrasing or contact HR at 541-475-3802 for assistance.",
-                    "sources": [],
-                    "reasoning_steps": self.reasoning_steps
-                }
+                return self._result(
+                    "I couldn't find relevant information in the KEITH Employee Handbook to answer your question. Please try rephrasing or contact HR at 541-475-3802 for assistance.",
+                    []
+                ), []
             
-            # Step 3: Evaluate
-            self._update_status("📊 Evaluating results...")
-            evaluation = self._evaluate_results(question, top_results)
+            # Step 3: Evaluate (skipped when retrieval alone is decisive)
+            eval_state = EvaluationState()
+            evaluation = self._gate_evaluation(per_query_results, top_results, plan)
+            if evaluation is None and not deadline.allows("evaluation"):
+                self._skip_stage("evaluation")
+                evaluation = {"sufficient": True, "confidence": 0.0, "missing_info": None}
+            if evaluation is None and self.speculative:
+                # Most verdicts are "sufficient": draft the answer while the evaluator runs
+                self._update_status("📊 Evaluating results (drafting answer)...")
+                draft = self._start_draft(question, top_results)
+                evaluation = self._evaluate_results(question, top_results, eval_state)
+            elif evaluation is None:
+                self._update_status("📊 Evaluating results...")
+                evaluation = self._evaluate_results(question, top_results, eval_state)
             
             # Step 4: Re-search if needed
             iteration = 0
@@ -260,6 +1011,10 @@ class AgenticRAG:
                    evaluation.get("suggested_search") and 
                    iteration < MAX_AGENT_ITERATIONS):
                 
+                if not deadline.allows("refinement", "evaluation"):
+                    self._skip_stage("refinement")
+                    break
+                
                 iteration += 1
                 self._update_status(f"🔄 Refining search (attempt {iteration})...")
                 
@@ -274,22 +1029,44 @@ class AgenticRAG:
                 top_results.sort(key=lambda x: x.get('score', 0), reverse=True)
                 top_results = top_results[:8]
                 
-                evaluation = self._evaluate_results(question, top_results)
+                evaluation = self._evaluate_results(question, top_results, eval_state)
             
-            # Step 5: Generate answer
+            # Step 5: Generate answer (or keep the draft if the context did not change)
             self._update_status("✍️ Generating answer...")
+            answer = self._finish_draft(draft, top_results) if draft is not None else None
             reasoning_summary = "\n".join([
                 f"- {s['step']}: {s['description']}" 
                 for s in self.reasoning_steps
             ])
-            answer = self._generate_answer(question, top_results, reasoning_summary)
+            if answer is None:
+                try:
+                    answer = self._generate_answer(question, top_results, reasoning_summary)
+                except (TimeoutError, openai.APITimeoutError) as e:
+                    return self._timed_out_result(top_results, e), top_results
             
-            # Step 6: Self-critique
-            self._update_status("🔎 Reviewing answer...")
-            critique = self._self_critique(question, top_results, answer)
+            # Step 6: Verify locally; only suspicious answers get the LLM critique
+            # (async mode reviews off the critical path)
+            critique = {"final_verdict": "approve"}
+            review_id = None
+            verification = self._verify_answer(question, top_results, answer)
+            flags = verification.issues if verification else None
+            needs_review = verification is None or not verification.ok
+            if needs_review and self.critique_mode == "async":
+                self._add_reasoning("Self-Critique", "Reviewing answer in the background...")
+                review_id = _track_review(_review_executor.submit(
+                    self._review_in_background, question, list(top_results), answer, reasoning_summary, flags
+                ))
+            elif needs_review and deadline.allows("critique", reserve_answer=False):
+                self._update_status("🔎 Reviewing answer...")
+                critique = self._self_critique(question, top_results, answer, flags)
+            elif needs_review:
+                self._skip_stage("critique")
             
             # Step 7: Revise if needed
-            if critique.get("final_verdict") == "revise" and critique.get("improvements"):
+            wants_revision = critique.get("final_verdict") == "revise" and critique.get("improvements")
+            if wants_revision and not deadline.allows("revision", reserve_answer=False):
+                self._skip_stage("revision")
+            elif wants_revision:
                 self._update_status("📝 Improving answer...")
                 self._add_reasoning("Revision", critique.get("improvements", "Minor improvements"))
                 
@@ -299,27 +1076,16 @@ class AgenticRAG:
             self._add_reasoning("Complete", "Answer ready")
             self._update_status("")
             
-            sources = [
-                {
-                    "page_number": r.get("page_number", 0),
-                    "section_title": r.get("section_title", "Unknown"),
-                    "score": r.get("score", 0),
-                    "chunk_id": r.get("chunk_id", r.get("id", ""))
-                }
-                for r in top_results[:5]
-            ]
-            
-            return {
-                "answer": answer,
-                "sources": sources,
-                "reasoning_steps": self.reasoning_steps
-            }
+            result = self._result(answer, self._sources(top_results))
+            if review_id:
+                result["review_pending"] = True
+                result["review_id"] = review_id
+            return result, top_results
             
         except Exception as e:
             self._add_reasoning("Error", str(e))
             self._update_status("")
-            return {
-                "answer": f"I encountered an error while processing your question: {str(e)}. Please try again or contact HR at 541-475-3802.",
-                "sources": [],
-                "reasoning_steps": self.reasoning_steps
-            }
+            return self._result(
+                f"I encountered an error while processing your question: {str(e)}. Please try again or contact HR at 541-475-3802.",
+                []
+            ), []
@@ -0,0 +1,192 @@
+# FILE: rag/batch.py
+"""
+Parallel batch answering for question files (FAQ refreshes, quizzes, regression sets).
+
+    python -m rag.batch questions.jsonl -o answers.jsonl --concurrency 8
+
+Input is JSONL ({"id": ..., "question": ...}) or CSV with a "question"
+column and optional "id" column. Results are appended to the output JSONL
+as they complete, so an interrupted run resumes where it stopped; rows
+that failed are retried (the newest line for an id wins).
+Keys come from OPENAI_API_KEY, PINECONE_API_KEY and PINECONE_INDEX_NAME.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set
+
+from .agent import OPENAI_CHAT_MODEL
+from .embeddings import EMBEDDING_MODEL
+from .ratelimit import FALLBACK_MODEL_LIMITS, configure_scheduler, get_scheduler
+from .tiering import DEFAULT_STAGE_MODELS
+from .warmup import DEFAULT_NAMESPACE, start_warmup
+
+DEFAULT_CONCURRENCY = 4
+
+
+def read_questions(path: str) -> List[Dict]:
+    """Load questions from JSONL or CSV; rows without an id get "q<line>"."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    
+    questions = []
+    for i, row in enumerate(rows, start=1):
+        question = (row.get("question") or "").strip()
+        if question:
+            questions.append({"id": str(row.get("id") or f"q{i}"), "question": question})
+    return questions
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already answered in an output file (error rows and a torn last line are ignored)."""
+    if not os.path.exists(path):
+        return set()
+    
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                record_id = str(record["id"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+            if "error" in record:
+                done.discard(record_id)
+            else:
+                done.add(record_id)
+    return done
+
+
+def _drop_torn_line(path: str):
+    """Cut a partially written last line left by an interrupted run."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def _failure(result: Dict) -> Optional[str]:
+    """Error message of a result answer() returned for a failed or timed-out pipeline, else None."""
+    if result.get("timed_out"):
+        return "timed out before the answer was written"
+    if result.get("sources"):
+        return None
+    for step in result.get("reasoning_steps", []):
+        if step.get("type") == "error":
+            return step.get("description") or "unknown error"
+    return None
+
+
+def _answer_one(agent, item: Dict) -> Dict:
+    try:
+        result = agent.answer(item["question"])
+    except Exception as e:
+        return {**item, "error": str(e)}
+    # answer() reports pipeline failures as an apology with an Error step rather than raising
+    error = _failure(result)
+    if error is not None:
+        return {**item, **result, "error": error}
+    return {**item, **result}
+
+
+def run_batch(
+    agent,
+    questions: List[Dict],
+    output_path: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    log=None
+) -> int:
+    """
+    Answer questions concurrently, appending each result as it completes.
+    
+    Args:
+        agent: A (thread-safe) AgenticRAG
+        questions: [{"id", "question"}] items
+        output_path: JSONL file to append to; ids already in it are skipped
+        concurrency: Parallel answer() calls
+        log: Optional callable for progress lines
+        
+    Returns:
+        Number of questions answered in this run
+    """
+    _drop_torn_line(output_path)
+    done = completed_ids(output_path)
+    pending = [q for q in questions if q["id"] not in done]
+    if log:
+        log(f"{len(done)} already answered, {len(pending)} to go")
+    
+    write_lock = threading.Lock()
+    started = time.monotonic()
+    
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_answer_one, agent, item) for item in pending]
+        for n, future in enumerate(as_completed(futures), start=1):
+            record = future.result()
+            with write_lock:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            if log:
+                status = "error" if "error" in record else f"{record.get('timings', {}).get('total', 0):.1f}s"
+                log(f"[{n}/{len(pending)}] {record['id']} ({status}) - {time.monotonic() - started:.0f}s elapsed")
+    
+    return len(pending)
+
+
+def pinned_limits(models: Iterable[str], rpm: Optional[int], tpm: Optional[int]) -> Dict:
+    """Scheduler limits with every one of `models` capped at rpm/tpm (None keeps its current value)."""
+    limits = dict(get_scheduler().limits)
+    for model in models:
+        default_rpm, default_tpm = limits.get(model, FALLBACK_MODEL_LIMITS)
+        limits[model] = (rpm or default_rpm, tpm or default_tpm)
+    return limits
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Answer a file of handbook questions in parallel")
+    parser.add_argument("input", help="Questions file (.jsonl or .csv)")
+    parser.add_argument("-o", "--output", required=True, help="Results JSONL (appended; resumes)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--model", default=OPENAI_CHAT_MODEL, help="Chat model for answers")
+    parser.add_argument("--rpm", type=int, help="Requests/minute budget for each model the run calls")
+    parser.add_argument("--tpm", type=int, help="Tokens/minute budget for each model the run calls")
+    args = parser.parse_args(argv)
+    
+    if args.rpm or args.tpm:
+        # Answer, pipeline-stage (planner, evaluator, critique, fallback) and embedding models
+        models = {args.model, *DEFAULT_STAGE_MODELS.values(), EMBEDDING_MODEL}
+        # An explicit budget is a share of the account: do not grow it from response headers
+        configure_scheduler(limits=pinned_limits(models, args.rpm, args.tpm), learn_limits=False)
+    
+    def log(message: str):
+        print(message, file=sys.stderr, flush=True)
+    
+    questions = read_questions(args.input)
+    log(f"Loaded {len(questions)} questions; warming up...")
+    agent = start_warmup(
+        openai_api_key=os.environ["OPENAI_API_KEY"],
+        pinecone_api_key=os.environ["PINECONE_API_KEY"],
+        index_name=os.environ["PINECONE_INDEX_NAME"],
+        namespace=os.environ.get("PINECONE_NAMESPACE", DEFAULT_NAMESPACE),
+        local_index_dir=os.environ.get("LOCAL_INDEX_DIR"),
+        # A one-off run would wait at exit for background warming it never uses
+        precompute=False,
+        chat_model=args.model
+    ).result()
+    
+    run_batch(agent, questions, args.output, concurrency=args.concurrency, log=log)
+
+
+if __name__ == "__main__":
+    main()
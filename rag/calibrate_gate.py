@@ -0,0 +1,126 @@
+# FILE: rag/calibrate_gate.py
+"""
+Offline calibration of the evaluator confidence gate.
+
+    python -m rag.calibrate_gate labeled.jsonl -o gate.json --precision 0.95
+
+Each input line is {"question": ..., "sufficient": true/false}, where
+"sufficient" says whether the first retrieval was enough to answer.
+Lines without a label are labeled by running the LLM evaluator once.
+The chosen thresholds maximize how often the evaluator is skipped while
+keeping the skipped questions at least `precision` truly sufficient.
+Point CONFIDENCE_GATE_PATH at the output to use it.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from .agent import AgenticRAG
+from .confidence import FEATURES, ConfidenceGate, retrieval_features
+from .indexer import versioned_namespace
+from .warmup import DEFAULT_NAMESPACE
+
+DEFAULT_PRECISION = 0.95
+MIN_SUPPORT = 5
+QUANTILES = [i / 10 for i in range(10)]
+
+
+def collect_sample(agent: AgenticRAG, question: str, label: Optional[bool]) -> Tuple[Dict[str, float], bool]:
+    """Run plan + search for one question and return (features, sufficient)."""
+    agent.reasoning_steps = []
+    plan = agent._plan_search(question)
+    queries = (plan.get("sub_questions") or [question])[:3]
+
+    per_query = [agent._search(q, plan.get("topics")) for q in queries]
+    merged = {}
+    for results in per_query:
+        for r in results:
+            merged.setdefault(r["chunk_id"], r)
+    top_results = sorted(merged.values(), key=lambda r: r.get("score", 0), reverse=True)[:8]
+
+    features = retrieval_features(per_query, top_results, plan.get("search_terms") or [])
+    if label is None:
+        label = bool(agent._evaluate_results(question, top_results).get("sufficient", True))
+    return features, label
+
+
+def _candidates(values: List[float]) -> List[float]:
+    ordered = sorted(values)
+    picks = {0.0}
+    for q in QUANTILES:
+        picks.add(ordered[min(len(ordered) - 1, int(q * len(ordered)))])
+    return sorted(picks)
+
+
+def calibrate(
+    samples: List[Tuple[Dict[str, float], bool]],
+    precision: float = DEFAULT_PRECISION,
+    min_support: int = MIN_SUPPORT
+) -> Tuple[Optional[Dict[str, float]], Dict]:
+    """
+    Grid-search thresholds over per-feature quantiles.
+
+    Returns:
+        (thresholds, stats); thresholds is None if no setting reaches `precision`
+    """
+    grids = [_candidates([f[name] for f, _ in samples]) for name in FEATURES]
+    best, best_stats = None, {"skip_rate": 0.0, "precision": 0.0, "skipped": 0}
+
+    for combo in itertools.product(*grids):
+        thresholds = dict(zip(FEATURES, combo))
+        skipped = [label for f, label in samples if all(f[n] >= thresholds[n] for n in FEATURES)]
+        if len(skipped) < min_support:
+            continue
+        hit_rate = sum(skipped) / len(skipped)
+        if hit_rate < precision:
+            continue
+        if (len(skipped), hit_rate) > (best_stats["skipped"], best_stats["precision"]):
+            best = thresholds
+            best_stats = {
+                "skip_rate": len(skipped) / len(samples),
+                "precision": hit_rate,
+                "skipped": len(skipped),
+            }
+
+    best_stats["samples"] = len(samples)
+    return best, best_stats
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Calibrate the evaluator confidence gate")
+    parser.add_argument("input", help="Labeled questions (.jsonl)")
+    parser.add_argument("-o", "--output", required=True, help="Gate thresholds JSON to write")
+    parser.add_argument("--precision", type=float, default=DEFAULT_PRECISION,
+                        help="Minimum share of skipped questions that must be truly sufficient")
+    args = parser.parse_args(argv)
+
+    agent = AgenticRAG(
+        openai_api_key=os.environ["OPENAI_API_KEY"],
+        pinecone_api_key=os.environ["PINECONE_API_KEY"],
+        index_name=os.environ["PINECONE_INDEX_NAME"],
+        namespace=versioned_namespace(os.environ.get("PINECONE_NAMESPACE", DEFAULT_NAMESPACE)),
+        use_confidence_gate=False
+    )
+
+    samples = []
+    with open(args.input, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    for i, row in enumerate(rows, start=1):
+        samples.append(collect_sample(agent, row["question"], row.get("sufficient")))
+        print(f"[{i}/{len(rows)}] {row['question'][:60]}", file=sys.stderr)
+
+    thresholds, stats = calibrate(samples, precision=args.precision)
+    if thresholds is None:
+        print(f"No thresholds reach precision {args.precision:.0%}; keeping defaults", file=sys.stderr)
+        thresholds = dict(ConfidenceGate().thresholds)
+
+    ConfidenceGate(thresholds).save(args.output, **stats)
+    print(json.dumps({"thresholds": thresholds, **stats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
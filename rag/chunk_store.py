@@ -0,0 +1,195 @@
+# FILE: rag/chunk_store.py
+"""
+Local id-indexed chunk store for KEITH Handbook Assistant.
+Chunk text stays in process memory; the vector index only holds ids and
+small filterable fields, and query results are hydrated from here.
+"""
+
+import hashlib
+import os
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .pdf import HANDBOOK_SOURCE_ENV, extract_pdf_chunks
+from .topics import STORED_TAGS
+
+CHUNK_FIELDS = ("chunk_id", "text", "page_number", "section_title", "topics", "source")
+_TOPIC_BITS = {tag: 1 << i for i, tag in enumerate(STORED_TAGS)}
+
+
+class ChunkView(Mapping):
+    """
+    Read-only view of one stored chunk.
+    
+    Attribute access (view.text) is the fast path; the Mapping interface
+    (view["text"], dict(view)) keeps code written for chunk dicts working.
+    "source" is only present for chunks that came from a PDF file.
+    """
+    
+    __slots__ = ("_store", "_row")
+    
+    def __init__(self, store: "ChunkStore", row: int):
+        self._store = store
+        self._row = row
+    
+    @property
+    def chunk_id(self) -> str:
+        return self._store._ids[self._row]
+    
+    @property
+    def text(self) -> str:
+        store = self._store
+        return store._text[store._starts[self._row]:store._starts[self._row + 1]].decode("utf-8")
+    
+    @property
+    def page_number(self) -> int:
+        return self._store._pages[self._row]
+    
+    @property
+    def section_title(self) -> str:
+        return self._store._labels[self._store._sections[self._row]]
+    
+    @property
+    def topics(self) -> List[str]:
+        bits = self._store._topics[self._row]
+        return [tag for tag in STORED_TAGS if bits & _TOPIC_BITS[tag]]
+    
+    @property
+    def source(self) -> Optional[str]:
+        label = self._store._sources[self._row]
+        return self._store._labels[label] if label >= 0 else None
+    
+    def _fields(self) -> Iterator[str]:
+        return (f for f in CHUNK_FIELDS if f != "source" or self._store._sources[self._row] >= 0)
+    
+    def __getitem__(self, key: str):
+        if key not in CHUNK_FIELDS or (key == "source" and self._store._sources[self._row] < 0):
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return self._fields()
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self._fields())
+    
+    def __repr__(self) -> str:
+        return f"ChunkView({dict(self)!r})"
+
+
+class ChunkStore:
+    """
+    Chunks keyed by chunk_id, stored column-wise, with a content fingerprint.
+    
+    All chunk text lives in one UTF-8 buffer addressed by byte offsets (a
+    joined str would widen to 2-4 bytes per character after one non-ASCII
+    character). Page numbers, interned section/source label ids and topic
+    bitmasks are integer arrays; only the chunk ids themselves are Python
+    objects.
+    """
+    
+    def __init__(self, chunks: Iterable[Dict]):
+        self._row_of: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._starts = array("q", [0])
+        self._pages = array("i")
+        self._sections = array("i")
+        self._sources = array("i")
+        self._topics = array("q")
+        self._labels: List[str] = []
+        label_ids: Dict[str, int] = {}
+        parts: List[bytes] = []
+        length = 0
+        
+        def intern(label: str) -> int:
+            if label not in label_ids:
+                label_ids[label] = len(self._labels)
+                self._labels.append(label)
+            return label_ids[label]
+        
+        for chunk in chunks:
+            chunk_id = chunk["chunk_id"]
+            if chunk_id in self._row_of:
+                raise ValueError(f"Duplicate chunk id: {chunk_id}")
+            self._row_of[chunk_id] = len(self._ids)
+            self._ids.append(chunk_id)
+            encoded = chunk["text"].encode("utf-8")
+            parts.append(encoded)
+            length += len(encoded)
+            self._starts.append(length)
+            self._pages.append(int(chunk["page_number"]))
+            self._sections.append(intern(chunk["section_title"]))
+            source = chunk.get("source")
+            self._sources.append(intern(source) if source else -1)
+            self._topics.append(sum(_TOPIC_BITS.get(tag, 0) for tag in set(chunk.get("topics") or ())))
+        self._text = b"".join(parts)
+        
+        digest = hashlib.sha256()
+        for view in self:
+            for value in (view.chunk_id, view.page_number, view.section_title, view.text):
+                digest.update(str(value).encode("utf-8"))
+                digest.update(b"\0")
+        self.fingerprint = digest.hexdigest()
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._row_of
+    
+    def __iter__(self) -> Iterator[ChunkView]:
+        return (ChunkView(self, row) for row in range(len(self._ids)))
+    
+    def get(self, chunk_id: str) -> Optional[ChunkView]:
+        row = self._row_of.get(chunk_id)
+        return None if row is None else ChunkView(self, row)
+    
+    def chunks(self) -> List[ChunkView]:
+        return list(self)
+    
+    def has_topic(self, chunk_id: str, topics: List[str]) -> bool:
+        """True if the chunk carries any of `topics`."""
+        row = self._row_of.get(chunk_id)
+        mask = sum(_TOPIC_BITS.get(tag, 0) for tag in topics)
+        return row is not None and bool(self._topics[row] & mask)
+    
+    def hydrate(self, results: List[Dict]) -> List[Dict]:
+        """Fill text, page_number and section_title into id-only query results."""
+        for result in results:
+            row = self._row_of.get(result["chunk_id"])
+            if row is None:
+                result.setdefault("text", "")
+                result.setdefault("page_number", 0)
+                result.setdefault("section_title", "")
+                continue
+            result["text"] = self._text[self._starts[row]:self._starts[row + 1]].decode("utf-8")
+            result["page_number"] = self._pages[row]
+            result["section_title"] = self._labels[self._sections[row]]
+        return results
+
+
+_store: Optional[ChunkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    """
+    Get the process-wide chunk store, built from the handbook on first use.
+    
+    $HANDBOOK_SOURCE may point at a PDF or a directory of PDFs; otherwise
+    the embedded handbook text is used.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkStore(extract_pdf_chunks(os.environ.get(HANDBOOK_SOURCE_ENV) or None))
+        return _store
+
+
+def set_chunk_store(store: ChunkStore):
+    """Replace the process-wide chunk store (e.g. for a different corpus)."""
+    global _store
+    with _store_lock:
+        _store = store
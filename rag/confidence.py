@@ -0,0 +1,104 @@
+# FILE: rag/confidence.py
+"""
+Retrieval-confidence gate for KEITH Handbook Assistant.
+Decides from local retrieval statistics whether the evaluator LLM call can
+be skipped. Thresholds come from rag.calibrate_gate run against a labeled
+question set; the defaults below are deliberately conservative.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+# Every feature must meet its threshold for the gate to open
+DEFAULT_THRESHOLDS = {
+    "top_score": 0.62,
+    "margin": 0.04,
+    "agreement": 0.67,
+    "lexical_overlap": 0.6,
+}
+FEATURES = tuple(DEFAULT_THRESHOLDS)
+GATE_PATH_ENV = "CONFIDENCE_GATE_PATH"
+
+_TERM_SPLIT = re.compile(r"[^\w%]+")
+
+
+def _chunk_id(result: Dict) -> str:
+    return result.get("chunk_id", result.get("id", ""))
+
+
+def retrieval_features(
+    per_query_results: List[List[Dict]],
+    top_results: List[Dict],
+    search_terms: List[str]
+) -> Dict[str, float]:
+    """
+    Summarize how decisive a retrieval was.
+
+    Args:
+        per_query_results: Ranked results of each sub-query
+        top_results: Merged results, best first
+        search_terms: Key terms from the plan
+
+    Returns:
+        top_score: Best similarity score
+        margin: Best score minus the runner-up's
+        agreement: Share of sub-queries ranking the best chunk in their top 3
+        lexical_overlap: Share of search-term words present in the top 3 chunks
+    """
+    if not top_results:
+        return {name: 0.0 for name in FEATURES}
+
+    scores = [r.get("score", 0.0) for r in top_results]
+    best_id = _chunk_id(top_results[0])
+
+    queries = [results for results in per_query_results if results]
+    agreement = (
+        sum(1 for results in queries if best_id in {_chunk_id(r) for r in results[:3]}) / len(queries)
+        if queries else 0.0
+    )
+
+    words = {
+        word
+        for term in search_terms
+        for word in _TERM_SPLIT.split(str(term).lower())
+        if len(word) > 2
+    }
+    top_text = " ".join(r.get("text", "") for r in top_results[:3]).lower()
+    lexical_overlap = sum(1 for w in words if w in top_text) / len(words) if words else 0.0
+
+    return {
+        "top_score": scores[0],
+        "margin": scores[0] - scores[1] if len(scores) > 1 else scores[0],
+        "agreement": agreement,
+        "lexical_overlap": lexical_overlap,
+    }
+
+
+class ConfidenceGate:
+    """Opens (skip the evaluator) only when every feature clears its threshold."""
+
+    def __init__(self, thresholds: Optional[Dict[str, float]] = None):
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+    def is_confident(self, features: Dict[str, float]) -> bool:
+        return all(features.get(name, 0.0) >= self.thresholds[name] for name in FEATURES)
+
+    def save(self, path: str, **stats):
+        """Write thresholds (plus any calibration stats) as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"thresholds": self.thresholds, **stats}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "ConfidenceGate":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["thresholds"])
+
+    @classmethod
+    def from_env(cls) -> "ConfidenceGate":
+        """Calibrated thresholds from $CONFIDENCE_GATE_PATH, else the defaults."""
+        path = os.environ.get(GATE_PATH_ENV)
+        if path and os.path.exists(path):
+            return cls.load(path)
+        return cls()
@@ -0,0 +1,76 @@
+# FILE: rag/deadline.py
+"""
+Per-request latency budget for KEITH Handbook Assistant.
+A Deadline is created when answer() starts and consulted by every stage:
+LLM calls get timeouts derived from the time left, and optional stages
+(refinement, critique, revision) are skipped when it runs low.
+"""
+
+import time
+from typing import Optional
+
+# Floor for any single LLM call; below this a call is not worth starting
+MIN_CALL_TIMEOUT = 1.0
+
+# Typical seconds each stage needs, used to decide what still fits
+STAGE_COSTS = {
+    "planning": 3.0,
+    "evaluation": 3.0,
+    "refinement": 4.0,
+    "answer": 8.0,
+    "critique": 4.0,
+    "revision": 8.0,
+}
+
+
+class BudgetExhausted(TimeoutError):
+    """Raised when no time is left for a required call."""
+
+
+class Deadline:
+    """Monotonic deadline; an unbounded Deadline never runs out."""
+    
+    def __init__(self, budget: Optional[float] = None):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires = None if budget is None else self.started + budget
+    
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when unbounded."""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+    
+    def allows(self, *stages: str, reserve_answer: bool = True) -> bool:
+        """
+        True if the named stages still fit in the time left.
+        
+        Args:
+            *stages: Keys of STAGE_COSTS about to run
+            reserve_answer: Also keep time for the final answer (False once
+                the answer has been generated)
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return True
+        needed = sum(STAGE_COSTS[s] for s in stages)
+        if reserve_answer:
+            needed += STAGE_COSTS["answer"]
+        return remaining >= needed
+    
+    def timeout(self, preferred: float) -> float:
+        """
+        Timeout for one call: the preferred value capped by the time left.
+        
+        Raises:
+            BudgetExhausted: If less than MIN_CALL_TIMEOUT is left
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return preferred
+        if remaining < MIN_CALL_TIMEOUT:
+            raise BudgetExhausted(f"Latency budget of {self.budget:.0f}s exhausted")
+        return min(preferred, remaining)
@@ -1,50 +1,240 @@
 # FILE: rag/embeddings.py
 """
-OpenAI embeddings client for KEITH Handbook Assistant.
-Uses text-embedding-3-small model with 1536 dimensions.
+Embeddings for KEITH Handbook Assistant.
+The default provider calls OpenAI text-embedding-3-small; the output
+dimension is configurable through the EMBEDDING_DIMENSION environment
+variable (e.g. 256 or 512). EMBEDDING_PROVIDER=local switches to a hashed
+n-gram TF-IDF vectorizer that runs in-process with no network access.
 """
 
+import math
+import os
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Iterable, Optional
+
+import numpy as np
 from openai import OpenAI
-import time
+
+from .chunk_store import get_chunk_store
+from .ratelimit import PRIORITY_INTERACTIVE, estimate_tokens, get_scheduler
 
 EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_DIMENSION = 1536
+NATIVE_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+# Single source of truth for index creation, embedding calls and the index fingerprint
+EMBEDDING_DIMENSION = int(os.environ.get("EMBEDDING_DIMENSION", NATIVE_DIMENSIONS[EMBEDDING_MODEL]))
+EMBEDDING_PROVIDER_ENV = "EMBEDDING_PROVIDER"
 MAX_BATCH_SIZE = 100
 
+def _dimension_kwargs(model: str, dimensions: Optional[int]) -> dict:
+    """Request shortened embeddings where the model supports it."""
+    if dimensions is None or dimensions == NATIVE_DIMENSIONS.get(model):
+        return {}
+    if not model.startswith("text-embedding-3"):
+        raise ValueError(f"{model} does not support a custom embedding dimension")
+    return {"dimensions": dimensions}
 
-def get_embeddings(
+
+def _openai_embeddings(
     texts: list[str],
     api_key: str,
-    model: str = EMBEDDING_MODEL,
-    batch_size: int = MAX_BATCH_SIZE,
-    retry_attempts: int = 3
+    model: str,
+    batch_size: int,
+    retry_attempts: int,
+    priority: int,
+    dimensions: Optional[int]
 ) -> list[list[float]]:
-    """Generate embeddings for a list of texts using OpenAI API."""
-    client = OpenAI(api_key=api_key)
+    # Retries are owned by the shared scheduler, not the SDK
+    client = OpenAI(api_key=api_key, max_retries=0)
+    scheduler = get_scheduler()
+    extra = _dimension_kwargs(model, dimensions)
     all_embeddings = []
     
     for i in range(0, len(texts), batch_size):
         batch = texts[i:i + batch_size]
         
-        for attempt in range(retry_attempts):
-            try:
-                response = client.embeddings.create(
-                    model=model,
-                    input=batch
-                )
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-                break
-            except Exception as e:
-                if attempt < retry_attempts - 1:
-                    time.sleep(2 ** attempt)
-                else:
-                    raise RuntimeError(f"Failed to generate embeddings: {e}")
+        try:
+            raw = scheduler.call(
+                model,
+                lambda: client.embeddings.with_raw_response.create(model=model, input=batch, **extra),
+                tokens=sum(estimate_tokens(t) for t in batch),
+                priority=priority,
+                max_retries=retry_attempts - 1
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate embeddings: {e}")
+        
+        all_embeddings.extend(item.embedding for item in raw.parse().data)
     
     return all_embeddings
 
 
-def get_single_embedding(text: str, api_key: str, model: str = EMBEDDING_MODEL) -> list[float]:
+class EmbeddingProvider(ABC):
+    """
+    Turns texts into vectors.
+    
+    `identity` is recorded in the index fingerprint, so vectors made by
+    different providers (or settings) never share a namespace.
+    """
+    
+    identity: str
+    dimension: int
+    
+    @abstractmethod
+    def embed(
+        self,
+        texts: list[str],
+        api_key: Optional[str] = None,
+        batch_size: int = MAX_BATCH_SIZE,
+        retry_attempts: int = 3,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> list[list[float]]:
+        """One vector per text, `dimension` floats each."""
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API, admitted through the shared rate-limit scheduler."""
+    
+    def __init__(self, model: str = EMBEDDING_MODEL, dimension: Optional[int] = EMBEDDING_DIMENSION):
+        self.model = model
+        self.dimension = dimension or NATIVE_DIMENSIONS[model]
+        # Same string the fingerprint used before providers existed, so OpenAI namespaces carry over
+        self.identity = f"{model}|{self.dimension}"
+    
+    def embed(self, texts, api_key=None, batch_size=MAX_BATCH_SIZE, retry_attempts=3, priority=PRIORITY_INTERACTIVE):
+        return _openai_embeddings(texts, api_key, self.model, batch_size, retry_attempts, priority, self.dimension)
+
+
+_TOKEN = re.compile(r"[a-z0-9%$]+")
+
+
+class HashedNgramProvider(EmbeddingProvider):
+    """
+    Local TF-IDF over hashed word, word-bigram and character n-gram features.
+    
+    Features are hashed (crc32, signed) into `dimension` buckets; IDF weights
+    per bucket are fit on the corpus. Query embedding is pure CPU and takes
+    well under a millisecond.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, char_ngrams: tuple = (3, 5)):
+        self.dimension = dimension
+        self.char_ngrams = char_ngrams
+        self.idf = np.ones(dimension, dtype=np.float32)
+        self.identity = f"hashed-ngram-v{self.VERSION}|{dimension}|{char_ngrams[0]}-{char_ngrams[1]}"
+    
+    def _features(self, text: str) -> Counter:
+        words = _TOKEN.findall(text.lower())
+        grams = Counter(words)
+        grams.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        low, high = self.char_ngrams
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, min(high, len(padded)) + 1):
+                grams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return grams
+    
+    def _buckets(self, text: str):
+        for gram, count in self._features(text).items():
+            h = zlib.crc32(gram.encode("utf-8"))
+            yield h % self.dimension, (1.0 if h & 0x80000000 else -1.0), count
+    
+    def fit(self, corpus: Iterable[str]) -> "HashedNgramProvider":
+        """Set smoothed IDF weights from document frequencies in `corpus`."""
+        df = np.zeros(self.dimension, dtype=np.float64)
+        docs = 0
+        for text in corpus:
+            docs += 1
+            df[list({bucket for bucket, _, _ in self._buckets(text)})] += 1
+        self.idf = (np.log((1 + docs) / (1 + df)) + 1).astype(np.float32)
+        return self
+    
+    def embed(self, texts, api_key=None, batch_size=MAX_BATCH_SIZE, retry_attempts=3, priority=PRIORITY_INTERACTIVE):
+        vectors = []
+        for text in texts:
+            vec = np.zeros(self.dimension, dtype=np.float32)
+            for bucket, sign, count in self._buckets(text):
+                vec[bucket] += sign * (1.0 + math.log(count)) * self.idf[bucket]
+            norm = float(np.linalg.norm(vec))
+            vectors.append((vec / norm if norm else vec).tolist())
+        return vectors
+
+
+_provider: Optional[EmbeddingProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """
+    Get the process-wide embedding provider, chosen by $EMBEDDING_PROVIDER.
+    
+    "openai" (default) or "local"; the local provider is fit on the shared
+    chunk store the first time it is requested.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            name = os.environ.get(EMBEDDING_PROVIDER_ENV, "openai").lower()
+            if name == "openai":
+                _provider = OpenAIEmbeddingProvider()
+            elif name == "local":
+                _provider = HashedNgramProvider().fit(c.text for c in get_chunk_store())
+            else:
+                raise ValueError(f"Unknown {EMBEDDING_PROVIDER_ENV}: {name!r} (expected 'openai' or 'local')")
+        return _provider
+
+
+def set_embedding_provider(provider: EmbeddingProvider):
+    """Replace the process-wide embedding provider."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+def get_embeddings(
+    texts: list[str],
+    api_key: Optional[str] = None,
+    model: Optional[str] = None,
+    batch_size: int = MAX_BATCH_SIZE,
+    retry_attempts: int = 3,
+    priority: int = PRIORITY_INTERACTIVE,
+    dimensions: Optional[int] = None
+) -> list[list[float]]:
+    """
+    Generate embeddings for a list of texts.
+    
+    Uses the process-wide provider; passing `model` or `dimensions` asks
+    for that OpenAI model explicitly instead.
+    """
+    if model is not None or dimensions is not None:
+        provider = OpenAIEmbeddingProvider(model or EMBEDDING_MODEL, dimensions or EMBEDDING_DIMENSION)
+    else:
+        provider = get_embedding_provider()
+    return provider.embed(
+        texts,
+        api_key,
+        batch_size=batch_size,
+        retry_attempts=retry_attempts,
+        priority=priority
+    )
+
+
+def get_single_embedding(
+    text: str,
+    api_key: Optional[str] = None,
+    model: Optional[str] = None,
+    dimensions: Optional[int] = None,
+    priority: int = PRIORITY_INTERACTIVE
+) -> list[float]:
     """Generate embedding for a single text."""
-    embeddings = get_embeddings([text], api_key, model)
+    embeddings = get_embeddings([text], api_key, model, priority=priority, dimensions=dimensions)
     return embeddings[0]
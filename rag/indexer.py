@@ -4,42 +4,90 @@ Handbook indexer for KEITH Manufacturing.
 Handles one-time indexing of the pre-loaded handbook PDF.
 """
 
+import hashlib
 import os
-from typing import Optional
+from typing import Callable, Dict, Optional
 
-from .pdf import extract_pdf_chunks
-from .embeddings import get_embeddings
+from .chunk_store import get_chunk_store
+from .embeddings import get_embedding_provider, get_embeddings
+from .ingest import ingest_chunks, load_checkpoint
+from .local_index import QuantizedIndex
+from .ratelimit import PRIORITY_BACKGROUND
 from .pinecone_store import (
     init_pinecone,
     create_index_if_not_exists,
-    upsert_chunks,
     get_namespace_count
 )
 
 
+# Bump when the vector id/metadata layout changes so old namespaces are not reused
+INDEX_SCHEMA_VERSION = 4
+
+CHECKPOINT_PATH_ENV = "INDEX_CHECKPOINT_PATH"
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "keith-handbook", "index_checkpoint.jsonl")
+
+
+def default_checkpoint_path() -> Optional[str]:
+    """Ingestion resume file at $INDEX_CHECKPOINT_PATH (default under ~/.cache); None if disabled."""
+    return os.environ.get(CHECKPOINT_PATH_ENV, DEFAULT_CHECKPOINT_PATH) or None
+
+
+def index_fingerprint() -> str:
+    """Hash of everything that must match between the index and this process."""
+    parts = [
+        str(INDEX_SCHEMA_VERSION),
+        get_embedding_provider().identity,
+        get_chunk_store().fingerprint
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def versioned_namespace(namespace: str) -> str:
+    """
+    Namespace tagged with the index fingerprint.
+    
+    Vectors only carry chunk ids, so a namespace must never be queried with
+    a chunk store it was not built from. Any change to the handbook text,
+    chunking, embedding provider or its settings yields a fresh namespace
+    and a re-index.
+    """
+    return f"{namespace}-{index_fingerprint()[:12]}"
+
+
 def check_index_exists(
     api_key: str,
     index_name: str,
     namespace: str,
-    min_vectors: int = 10
+    min_vectors: Optional[int] = None,
+    checkpoint_path: Optional[str] = None
 ) -> bool:
     """
-    Check if the handbook has already been indexed.
+    Check if the handbook has been fully indexed.
+    
+    An interrupted run leaves a partial namespace behind; that counts as
+    not indexed, so the caller resumes it from the checkpoint.
     
     Args:
         api_key: Pinecone API key
         index_name: Pinecone index name
         namespace: Namespace to check
-        min_vectors: Minimum vector count to consider "indexed"
+        min_vectors: Vector count to consider "indexed" (default: every chunk)
+        checkpoint_path: Ingestion checkpoint; complete if it records every chunk id
         
     Returns:
-        True if index exists and has vectors
+        True if the namespace holds the whole handbook
     """
+    store = get_chunk_store()
+    expected = len(store) if min_vectors is None else min_vectors
+    # Namespace stats lag behind upserts, so a complete checkpoint is trusted first
+    done = load_checkpoint(checkpoint_path, namespace)
+    if done and all(chunk.chunk_id in done for chunk in store):
+        return True
     try:
         init_pinecone(api_key)
-        create_index_if_not_exists(index_name)
+        create_index_if_not_exists(index_name, dimension=get_embedding_provider().dimension)
         count = get_namespace_count(index_name, namespace)
-        return count >= min_vectors
+        return count >= expected
     except Exception:
         return False
 
@@ -48,7 +96,10 @@ def index_handbook(
     openai_api_key: str,
     pinecone_api_key: str,
     index_name: str,
-    namespace: str
+    namespace: str,
+    local_index_path: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None
 ) -> int:
     """
     Index the KEITH handbook into Pinecone.
@@ -59,30 +110,72 @@ def index_handbook(
         pinecone_api_key: Pinecone API key
         index_name: Pinecone index name
         namespace: Namespace to store vectors
+        local_index_path: Also save an int8 local index to this directory
+        checkpoint_path: Resume file for the ingestion pipeline
+        progress: Receives pipeline counters after each batch
         
     Returns:
         Number of chunks indexed
     """
     # Initialize Pinecone
     init_pinecone(pinecone_api_key)
-    create_index_if_not_exists(index_name)
+    create_index_if_not_exists(index_name, dimension=get_embedding_provider().dimension)
     
-    # Extract chunks from embedded handbook text
-    chunks = extract_pdf_chunks()
+    # Chunks come from the same local store that serves query text
+    chunks = get_chunk_store().chunks()
     
     if not chunks:
         raise ValueError("No chunks extracted from handbook")
     
-    # Generate embeddings
-    texts = [c["text"] for c in chunks]
-    embeddings = get_embeddings(texts, openai_api_key)
-    
-    # Upsert to Pinecone
-    upsert_chunks(
+    # Embed and upsert as overlapping stages
+    batches = []
+    counts = ingest_chunks(
+        chunks,
+        openai_api_key=openai_api_key,
         index_name=index_name,
-        chunks=chunks,
-        embeddings=embeddings,
-        namespace=namespace
+        namespace=namespace,
+        checkpoint_path=checkpoint_path,
+        progress=progress,
+        on_batch=(lambda batch, embeddings: batches.append((batch, embeddings))) if local_index_path else None
     )
     
+    if local_index_path:
+        if counts["skipped"]:
+            # Resumed run: the checkpointed batches' vectors are not in memory
+            load_or_build_local_index(openai_api_key, local_index_path)
+        else:
+            QuantizedIndex.build(
+                [c["chunk_id"] for batch, _ in batches for c in batch],
+                [e for _, embeddings in batches for e in embeddings],
+                fingerprint=index_fingerprint()
+            ).save(local_index_path)
+    
     return len(chunks)
+
+
+def load_or_build_local_index(openai_api_key: str, path: str) -> QuantizedIndex:
+    """
+    Load the local index at `path`, rebuilding it if missing or stale.
+    
+    Args:
+        openai_api_key: OpenAI API key (only used when rebuilding)
+        path: Directory holding the local index
+        
+    Returns:
+        A QuantizedIndex matching the current index fingerprint
+    """
+    fingerprint = index_fingerprint()
+    try:
+        return QuantizedIndex.load(path, fingerprint=fingerprint)
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    chunks = get_chunk_store().chunks()
+    embeddings = get_embeddings(
+        [c["text"] for c in chunks],
+        openai_api_key,
+        priority=PRIORITY_BACKGROUND
+    )
+    index = QuantizedIndex.build([c["chunk_id"] for c in chunks], embeddings, fingerprint=fingerprint)
+    index.save(path)
+    return QuantizedIndex.load(path, fingerprint=fingerprint)
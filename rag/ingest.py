@@ -0,0 +1,224 @@
+# FILE: rag/ingest.py
+"""
+Pipelined bulk ingestion for KEITH Handbook Assistant.
+Chunk batches flow through bounded queues into a pool of embedding workers
+and a pool of upsert workers, so upserting one batch overlaps with
+embedding the next. Full queues block the producer (backpressure), which
+keeps memory bounded however large the corpus. Finished batches are
+appended to an optional checkpoint file so an interrupted run resumes
+where it stopped.
+"""
+
+import json
+import os
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .embeddings import MAX_BATCH_SIZE, get_embeddings
+from .pinecone_store import upsert_chunks
+from .ratelimit import PRIORITY_BACKGROUND
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_EMBED_WORKERS = 4
+DEFAULT_UPSERT_WORKERS = 2
+# Batches waiting per stage; bounds memory to roughly (2 * queue + workers) batches
+DEFAULT_QUEUE_SIZE = 4
+
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+
+def load_checkpoint(path: Optional[str], namespace: str) -> Set[str]:
+    """Chunk ids already upserted into `namespace` by an earlier run."""
+    if not path or not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if entry.get("namespace") == namespace:
+                done.update(entry.get("ids", []))
+    return done
+
+
+class _Pipeline:
+    def __init__(self, queue_size: int):
+        self.embed_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.upsert_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stop = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.lock = threading.Lock()
+        self.counts = {"chunked": 0, "skipped": 0, "embedded": 0, "upserted": 0}
+
+    def fail(self, error: BaseException):
+        with self.lock:
+            if self.error is None:
+                self.error = error
+        self.stop.set()
+
+    def put(self, q: queue.Queue, item) -> bool:
+        """Blocking put that gives up once the pipeline is stopping."""
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q: queue.Queue):
+        """Blocking get that returns _DONE once the pipeline is stopping."""
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+
+def ingest_chunks(
+    chunks: Iterable[Dict],
+    openai_api_key: str,
+    index_name: str,
+    namespace: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    embed_workers: int = DEFAULT_EMBED_WORKERS,
+    upsert_workers: int = DEFAULT_UPSERT_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    checkpoint_path: Optional[str] = None,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    on_batch: Optional[Callable[[List[Dict], List[List[float]]], None]] = None
+) -> Dict[str, int]:
+    """
+    Embed and upsert chunks as overlapping, concurrent stages.
+
+    Args:
+        chunks: Chunk dicts (chunk_id, text, page_number, section_title);
+            may be a generator, it is consumed lazily
+        openai_api_key: OpenAI API key
+        index_name: Pinecone index name
+        namespace: Namespace to store vectors
+        batch_size: Chunks per embedding request and upsert
+        embed_workers: Concurrent embedding requests
+        upsert_workers: Concurrent Pinecone upserts
+        queue_size: Batches buffered between stages
+        checkpoint_path: JSONL file recording finished batches; chunks listed
+            there for this namespace are skipped
+        progress: Called with a copy of the counters after each batch
+        on_batch: Called with (chunks, embeddings) of each upserted batch
+
+    Returns:
+        Counters: chunked, skipped (already checkpointed), embedded, upserted
+    """
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    done_ids = load_checkpoint(checkpoint_path, namespace)
+    pipe = _Pipeline(queue_size)
+    if checkpoint_path:
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+
+    def report():
+        if progress is not None:
+            progress(dict(pipe.counts))
+
+    def embed_worker():
+        try:
+            while True:
+                batch = pipe.get(pipe.embed_queue)
+                if batch is _DONE:
+                    return
+                embeddings = get_embeddings(
+                    [c["text"] for c in batch],
+                    openai_api_key,
+                    batch_size=batch_size,
+                    priority=PRIORITY_BACKGROUND
+                )
+                with pipe.lock:
+                    pipe.counts["embedded"] += len(batch)
+                if not pipe.put(pipe.upsert_queue, (batch, embeddings)):
+                    return
+        except Exception as e:
+            pipe.fail(e)
+
+    def upsert_worker():
+        try:
+            while True:
+                item = pipe.get(pipe.upsert_queue)
+                if item is _DONE:
+                    return
+                batch, embeddings = item
+                upsert_chunks(
+                    index_name=index_name,
+                    chunks=batch,
+                    embeddings=embeddings,
+                    namespace=namespace,
+                    batch_size=batch_size
+                )
+                if on_batch is not None:
+                    on_batch(batch, embeddings)
+                with pipe.lock:
+                    pipe.counts["upserted"] += len(batch)
+                    if checkpoint is not None:
+                        checkpoint.write(json.dumps({
+                            "namespace": namespace,
+                            "ids": [c["chunk_id"] for c in batch]
+                        }) + "\n")
+                        checkpoint.flush()
+                    report()
+        except Exception as e:
+            pipe.fail(e)
+
+    embedders = [
+        threading.Thread(target=embed_worker, name=f"rag-ingest-embed-{i}", daemon=True)
+        for i in range(embed_workers)
+    ]
+    upserters = [
+        threading.Thread(target=upsert_worker, name=f"rag-ingest-upsert-{i}", daemon=True)
+        for i in range(upsert_workers)
+    ]
+    for thread in embedders + upserters:
+        thread.start()
+
+    try:
+        batch: List[Dict] = []
+        for chunk in chunks:
+            if pipe.stop.is_set():
+                break
+            with pipe.lock:
+                pipe.counts["chunked"] += 1
+                if chunk["chunk_id"] in done_ids:
+                    pipe.counts["skipped"] += 1
+                    continue
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                pipe.put(pipe.embed_queue, batch)
+                batch = []
+        if batch:
+            pipe.put(pipe.embed_queue, batch)
+
+        # Drain stage by stage: embedders finish before upserters are told to stop
+        for _ in embedders:
+            pipe.put(pipe.embed_queue, _DONE)
+        for thread in embedders:
+            thread.join()
+        for _ in upserters:
+            pipe.put(pipe.upsert_queue, _DONE)
+        for thread in upserters:
+            thread.join()
+    except BaseException as e:
+        pipe.fail(e)
+        for thread in embedders + upserters:
+            thread.join()
+        raise
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if pipe.error is not None:
+        raise RuntimeError(f"Ingestion failed: {pipe.error}") from pipe.error
+    report()
+    return dict(pipe.counts)
@@ -0,0 +1,253 @@
+# FILE: rag/intent.py
+"""
+Local small-talk and out-of-scope detection for KEITH Handbook Assistant.
+A nearest-centroid classifier over content-word counts routes greetings,
+thanks and off-topic questions to canned replies before any LLM call.
+A question is only short-circuited when most of its content words were
+seen in that label's examples; anything uncertain goes to the full pipeline.
+
+    python -m rag.intent train logged.jsonl -o intent.json
+    python -m rag.intent check [--model intent.json]
+
+trains on logged questions ({"question": ..., "label": ...}) on top of the
+built-in seed examples; point INTENT_MODEL_PATH at the output to use it.
+`check` (also run after training) fails if any handbook section title,
+asked as "what is the <title>", would be routed away from the handbook.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .normalize import normalize_question
+
+HANDBOOK = "handbook"
+GREETING = "greeting"
+THANKS = "thanks"
+OFF_TOPIC = "off_topic"
+
+MODEL_PATH_ENV = "INTENT_MODEL_PATH"
+# Saved models built with other features are ignored (seed examples are used instead)
+FEATURE_VERSION = 2
+# Best centroid must beat the handbook centroid by this much to short-circuit
+MIN_MARGIN = 0.05
+MAX_SMALL_TALK_WORDS = 8
+
+CANNED_RESPONSES = {
+    GREETING: "Hi! I'm the KEITH Handbook Assistant. Ask me about time off, benefits, leave, attendance, or any other policy in the Team Member Handbook.",
+    THANKS: "You're welcome! Let me know if you have any other questions about the KEITH Employee Handbook.",
+    OFF_TOPIC: "I couldn't find relevant information in the KEITH Employee Handbook to answer your question. Please try rephrasing or contact HR at 541-475-3802 for assistance.",
+}
+
+# Any of these words means the question is about the handbook, whatever the scores say
+HANDBOOK_VOCABULARY = {
+    "vacation", "pto", "sick", "holiday", "holidays", "leave", "fmla", "ofla", "benefit",
+    "benefits", "insurance", "health", "dental", "vision", "401k", "tardy", "tardies",
+    "late", "attendance", "accrue", "accrual", "cap", "pay", "paid", "payroll", "bonus",
+    "dress", "phone", "phones", "safety", "policy", "policies", "handbook", "hr", "shift",
+    "overtime", "schedule", "onboarding", "transfer", "termination", "keith", "suspension",
+    "discipline", "unpaid", "personal", "hours", "time", "off", "lunch", "break", "manager",
+    "leadership", "team", "employee", "job", "work", "harassment", "drug", "smoking",
+    "employment", "probation", "severance", "eap", "temporary", "worker", "workers", "write",
+    "warning", "review", "raise", "resign", "resignation", "fired", "hire", "hired", "training",
+}
+
+# Question filler that says nothing about intent ("what is the ...")
+STOPWORDS = {
+    "a", "about", "am", "an", "and", "any", "are", "as", "at", "be", "by", "can", "could",
+    "define", "definition", "did", "do", "does", "explain", "for", "from", "get", "has",
+    "have", "how", "i", "if", "in", "is", "it", "its", "me", "mean", "meaning", "means",
+    "my", "of", "on", "or", "our", "s", "should", "so", "tell", "that", "the", "there",
+    "this", "to", "us", "was", "we", "were", "what", "whats", "when", "where", "which",
+    "who", "whom", "why", "will", "with", "would", "you", "your",
+}
+
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    GREETING: [
+        "hi", "hello", "hey", "hey there", "good morning", "good afternoon", "good evening",
+        "hi there", "hello assistant", "yo", "howdy", "hi how are you", "what's up",
+        "hi how are you doing", "good day",
+    ],
+    THANKS: [
+        "thanks", "thank you", "thanks a lot", "thank you so much", "thx", "ty",
+        "great thanks", "perfect thank you", "awesome thanks", "got it thanks",
+        "ok thanks", "appreciate it", "that helps thanks", "cool thank you",
+    ],
+    OFF_TOPIC: [
+        "what's the weather today", "what is the weather like in madras",
+        "tell me a joke", "who won the game last night", "what's the capital of france",
+        "write me a poem", "what's the stock price of apple", "how do i cook rice",
+        "what movies are playing", "who is the president", "what's 2 plus 2",
+        "recommend a restaurant", "what time is it in tokyo", "translate hello to spanish",
+    ],
+    HANDBOOK: [
+        "how much vacation do i accrue per pay period in my 3rd year",
+        "what's the vacation cap and what happens if i hit it",
+        "what are the 6 paid holidays", "how do i request time off",
+        "what's the difference between fmla and ofla", "what's the dress code",
+        "how does the tardy policy work", "who is on the leadership team",
+        "when am i eligible for health insurance", "how many sick hours do i get",
+        "can i use my cell phone at work", "what happens if i'm late",
+        "how does the 401k match work", "how do internal transfers work",
+    ],
+}
+
+
+def content_words(text: str) -> List[str]:
+    """Words that carry intent: no stopwords and no bare numbers."""
+    return [w for w in normalize_question(text).split() if w not in STOPWORDS and not w.isdigit()]
+
+
+def featurize(text: str) -> Dict[str, float]:
+    """L2-normalized counts of content words (no stopwords, no bigrams)."""
+    counts = Counter(content_words(text))
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {term: v / norm for term, v in counts.items()}
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(term, 0.0) for term, v in a.items())
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over sparse lexical features."""
+
+    def __init__(self, centroids: Dict[str, Dict[str, float]]):
+        self.centroids = centroids
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]]) -> "IntentClassifier":
+        """Fit centroids from (text, label) pairs plus the seed examples."""
+        grouped: Dict[str, List[str]] = {label: list(texts) for label, texts in SEED_EXAMPLES.items()}
+        for text, label in examples:
+            grouped.setdefault(label, []).append(text)
+
+        centroids = {}
+        for label, texts in grouped.items():
+            total: Counter = Counter()
+            for text in texts:
+                total.update(featurize(text))
+            norm = math.sqrt(sum(v * v for v in total.values())) or 1.0
+            centroids[label] = {term: v / norm for term, v in total.items()}
+        return cls(centroids)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        features = featurize(text)
+        return {label: _cosine(features, centroid) for label, centroid in self.centroids.items()}
+
+    def classify(self, text: str, allow_off_topic: bool = True) -> str:
+        """
+        Label a question; anything uncertain is treated as a handbook question.
+
+        Args:
+            text: The question
+            allow_off_topic: False for follow-ups, whose meaning depends on context
+        """
+        words = normalize_question(text).split()
+        if not words or HANDBOOK_VOCABULARY.intersection(words):
+            return HANDBOOK
+
+        scores = self.scores(text)
+        label, best = max(scores.items(), key=lambda item: item[1])
+        if label == HANDBOOK or best - scores.get(HANDBOOK, 0.0) < MIN_MARGIN:
+            return HANDBOOK
+        # Every short-circuit needs most content words seen in that label's examples;
+        # one shared word ("president of the company") is not enough
+        terms = self.centroids.get(label, {})
+        content = content_words(text)
+        known = sum(1 for w in content if w in terms)
+        if 2 * known <= len(content):
+            return HANDBOOK
+        if label in (GREETING, THANKS) and len(words) > MAX_SMALL_TALK_WORDS:
+            return HANDBOOK
+        if label == OFF_TOPIC and not allow_off_topic:
+            return HANDBOOK
+        return label
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": FEATURE_VERSION, "centroids": self.centroids}, f)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IntentClassifier"]:
+        """Saved model, or None if it was built with other features (retrain it)."""
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != FEATURE_VERSION:
+            return None
+        return cls(payload["centroids"])
+
+    @classmethod
+    def from_env(cls) -> "IntentClassifier":
+        """Trained model from $INTENT_MODEL_PATH, else the seed examples."""
+        path = os.environ.get(MODEL_PATH_ENV)
+        if path and os.path.exists(path):
+            classifier = cls.load(path)
+            if classifier is not None:
+                return classifier
+        return cls.train([])
+
+
+def handbook_section_titles() -> List[str]:
+    """Section titles of the handbook pages and of every stored chunk."""
+    from .chunk_store import get_chunk_store
+    from .pdf import HANDBOOK_PAGES, extract_section_title
+
+    titles = [extract_section_title(page["text"]) for page in HANDBOOK_PAGES]
+    titles += [chunk.section_title for chunk in get_chunk_store()]
+    return sorted({t for t in titles if t and t != "Unknown"})
+
+
+def misrouted_titles(classifier: IntentClassifier, titles: Optional[Iterable[str]] = None) -> List[str]:
+    """Titles whose "what is the <title>" question is not classified as a handbook question."""
+    if titles is None:
+        titles = handbook_section_titles()
+    return [
+        title for title in titles
+        if classifier.classify(f"what is the {title}") != HANDBOOK
+    ]
+
+
+def _check(classifier: IntentClassifier) -> bool:
+    misrouted = misrouted_titles(classifier)
+    for title in misrouted:
+        print(f"Misrouted section title: what is the {title}", file=sys.stderr)
+    return not misrouted
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Train the local intent classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="Train on labeled logged questions (.jsonl)")
+    train.add_argument("input")
+    train.add_argument("-o", "--output", required=True)
+    check = sub.add_parser("check", help="Verify no handbook section title is routed away from the handbook")
+    check.add_argument("--model", help="Saved model (default: $INTENT_MODEL_PATH or the seed examples)")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        classifier = IntentClassifier.load(args.model) if args.model else IntentClassifier.from_env()
+        if classifier is None:
+            sys.exit(f"{args.model} was built with older features; retrain it")
+        if not _check(classifier):
+            sys.exit(1)
+        print(f"All {len(handbook_section_titles())} section titles route to the handbook")
+        return
+
+    with open(args.input, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    classifier = IntentClassifier.train((row["question"], row["label"]) for row in rows)
+    if not _check(classifier):
+        sys.exit("Not saved: the trained model routes handbook sections away from the handbook")
+    classifier.save(args.output)
+    print(f"Trained on {len(rows)} logged questions plus seed examples -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
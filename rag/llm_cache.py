@@ -0,0 +1,154 @@
+# FILE: rag/llm_cache.py
+"""
+Disk-backed exact-match cache for the JSON pipeline stages.
+Planner, evaluator and critique prompts are fully determined by their
+inputs, so a response is reused when the model, temperature, rendered
+messages and prompt version all match. Entries expire per stage and the
+least recently used ones are evicted past a size bound.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .prompts import PROMPT_VERSION
+
+CACHE_PATH_ENV = "LLM_CACHE_PATH"
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "keith-handbook", "llm_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 10_000
+# Seconds; stages not listed here are never cached
+DEFAULT_STAGE_TTLS = {
+    "planner": 7 * 24 * 3600,
+    "evaluator": 24 * 3600,
+    "critique": 24 * 3600,
+}
+# Evict down to this share of max_entries so eviction does not run on every put
+EVICT_TO = 0.9
+
+
+def cache_key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+    payload = json.dumps(
+        {"version": PROMPT_VERSION, "model": model, "temperature": temperature, "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite response cache with per-stage TTLs, LRU eviction and hit/miss counters (thread-safe)."""
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        stage_ttls: Optional[Dict[str, float]] = None
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.stage_ttls = {**DEFAULT_STAGE_TTLS, **(stage_ttls or {})}
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, stage TEXT NOT NULL, response TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    def caches(self, stage: str) -> bool:
+        return stage in self.stage_ttls
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        """Cached response for `key`, or None if missing or expired."""
+        return self.get_any(stage, [key])
+
+    def get_any(self, stage: str, keys: List[str]) -> Optional[str]:
+        """First cached response among `keys` (e.g. one per fallback model); one hit or miss is counted."""
+        if not self.caches(stage):
+            return None
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                row = self._db.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    continue
+                if now - row[1] <= self.stage_ttls[stage]:
+                    self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._hits[stage] = self._hits.get(stage, 0) + 1
+                    return row[0]
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+            self._misses[stage] = self._misses.get(stage, 0) + 1
+            return None
+
+    def put(self, stage: str, key: str, response: str):
+        if not self.caches(stage):
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, stage, response, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, stage, response, now, now)
+            )
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (count - int(self.max_entries * EVICT_TO),)
+                )
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hits, misses and stored entries per cacheable stage."""
+        with self._lock:
+            entries = dict(self._db.execute("SELECT stage, COUNT(*) FROM responses GROUP BY stage").fetchall())
+            return {
+                stage: {
+                    "hits": self._hits.get(stage, 0),
+                    "misses": self._misses.get(stage, 0),
+                    "entries": entries.get(stage, 0),
+                }
+                for stage in self.stage_ttls
+            }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+_cache_loaded = False
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Process-wide cache at $LLM_CACHE_PATH (default under ~/.cache).
+
+    Set LLM_CACHE_PATH to an empty string to disable caching (returns None).
+    """
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if not _cache_loaded:
+            path = os.environ.get(CACHE_PATH_ENV, DEFAULT_CACHE_PATH)
+            _cache = LLMCache(path) if path else None
+            _cache_loaded = True
+        return _cache
@@ -0,0 +1,175 @@
+# FILE: rag/local_index.py
+"""
+Local int8-quantized vector index for KEITH Handbook Assistant.
+A fast first pass scores int8 codes kept in memory; the top candidates are
+rescored against full-precision vectors that stay memory-mapped on disk.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .chunk_store import ChunkStore, get_chunk_store
+from .topics import filter_tags
+
+RESCORE_MULTIPLIER = 4
+SCAN_BLOCK_ROWS = 4096
+
+_META_FILE = "meta.json"
+_CODES_FILE = "codes.npy"
+_SCALES_FILE = "scales.npy"
+_VECTORS_FILE = "vectors.npy"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _quantize(vectors: np.ndarray) -> tuple:
+    """Symmetric per-row int8 quantization: row ≈ codes * scale."""
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    codes = np.round(vectors / scales[..., None]).astype(np.int8)
+    return codes, scales
+
+
+class QuantizedIndex:
+    """Cosine-similarity index with int8 first pass and float32 rescoring."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        codes: np.ndarray,
+        scales: np.ndarray,
+        vectors: np.ndarray,
+        fingerprint: str = ""
+    ):
+        self.ids = ids
+        self.codes = codes
+        self.scales = scales
+        self.vectors = vectors
+        self.fingerprint = fingerprint
+        self._topic_rows: Dict[tuple, np.ndarray] = {}
+
+    @property
+    def dimension(self) -> int:
+        return self.codes.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: List[str],
+        embeddings: List[List[float]],
+        fingerprint: str = ""
+    ) -> "QuantizedIndex":
+        """Build an index from full-precision embeddings."""
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        codes, scales = _quantize(vectors)
+        return cls(list(ids), codes, scales, vectors, fingerprint)
+
+    def save(self, path: str):
+        """Write the index to a directory."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, _CODES_FILE), self.codes)
+        np.save(os.path.join(path, _SCALES_FILE), self.scales)
+        np.save(os.path.join(path, _VECTORS_FILE), np.ascontiguousarray(self.vectors))
+        with open(os.path.join(path, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "fingerprint": self.fingerprint}, f)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: Optional[str] = None) -> "QuantizedIndex":
+        """
+        Load an index; full-precision vectors are memory-mapped, not read.
+
+        Raises:
+            ValueError: If `fingerprint` is given and does not match the saved index
+        """
+        with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+            raise ValueError(f"Local index at {path} was built for a different index fingerprint")
+
+        return cls(
+            meta["ids"],
+            np.load(os.path.join(path, _CODES_FILE)),
+            np.load(os.path.join(path, _SCALES_FILE)),
+            np.load(os.path.join(path, _VECTORS_FILE), mmap_mode="r"),
+            meta.get("fingerprint", "")
+        )
+
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        rows: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """Return [(id, score)] for the top_k most similar vectors, optionally among `rows` only."""
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        if not len(rows):
+            return []
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if query.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query.shape[0]} does not match index dimension {self.dimension}"
+            )
+        query_codes, query_scale = _quantize(query)
+        query_codes = query_codes.astype(np.int32)
+
+        # First pass: integer dot products, scanned in blocks to bound temporaries
+        full_scan = len(rows) == len(self.ids)
+        approx = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+            if full_scan:
+                block = self.codes[start:start + SCAN_BLOCK_ROWS]
+            else:
+                block = self.codes[rows[start:start + SCAN_BLOCK_ROWS]]
+            approx[start:start + len(block)] = block.astype(np.int32) @ query_codes
+        approx *= (self.scales if full_scan else self.scales[rows]) * query_scale
+
+        n_candidates = min(len(rows), max(top_k, top_k * RESCORE_MULTIPLIER))
+        # Sorted rows keep reads from the memory-mapped vectors sequential
+        candidates = np.sort(rows[np.argpartition(-approx, n_candidates - 1)[:n_candidates]])
+
+        # Second pass: exact cosine on the few candidates only
+        exact = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:top_k]
+        return [(self.ids[candidates[i]], float(exact[i])) for i in order]
+
+    def topic_rows(self, topics: List[str], chunk_store: Optional[ChunkStore] = None) -> np.ndarray:
+        """Rows whose chunk carries any of `topics` or no topic (cached per topic set)."""
+        key = tuple(sorted(filter_tags(topics)))
+        rows = self._topic_rows.get(key)
+        if rows is None:
+            store = chunk_store or get_chunk_store()
+            rows = np.array(
+                [i for i, chunk_id in enumerate(self.ids) if store.has_topic(chunk_id, list(key))],
+                dtype=np.int64
+            )
+            self._topic_rows[key] = rows
+        return rows
+
+    def query(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        include_metadata: bool = True,
+        chunk_store: Optional[ChunkStore] = None,
+        topics: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """Same result shape (and topic filter) as pinecone_store.query_similar."""
+        rows = self.topic_rows(topics, chunk_store) if topics else None
+        formatted = [
+            {"chunk_id": chunk_id, "score": score}
+            for chunk_id, score in self.search(query_vector, top_k, rows)
+        ]
+        if include_metadata:
+            (chunk_store or get_chunk_store()).hydrate(formatted)
+        return formatted
@@ -0,0 +1,169 @@
+# FILE: rag/memory.py
+"""
+Bounded multi-turn conversation memory for KEITH Handbook Assistant.
+Keeps the last few turns verbatim plus a rolling summary of everything
+older, so prompt size stays fixed however long the chat gets. Turns that
+fall out of the window wait verbatim until compact() folds them into the
+summary, which the agent runs off the request path.
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from .ratelimit import estimate_tokens
+
+MAX_RECENT_TURNS = 3
+MEMORY_TOKEN_BUDGET = 1200
+SUMMARY_TOKEN_BUDGET = 400
+TURN_ANSWER_CHARS = 600
+
+# summarize(previous_summary, evicted_turn_text) -> updated summary
+Summarizer = Callable[[str, str], str]
+
+
+def _clip_tokens(text: str, budget: int, keep_end: bool = False) -> str:
+    """Trim text to roughly `budget` tokens."""
+    max_chars = budget * 4
+    if len(text) <= max_chars:
+        return text
+    return "..." + text[-max_chars:] if keep_end else text[:max_chars] + "..."
+
+
+def format_turn(turn: Dict) -> str:
+    """Render one question/answer turn for prompts."""
+    answer = turn["answer"]
+    if len(answer) > TURN_ANSWER_CHARS:
+        answer = answer[:TURN_ANSWER_CHARS] + "..."
+    return f"Employee: {turn['question']}\nAssistant: {answer}"
+
+
+class ConversationMemory:
+    """Rolling summary + last N turns under a fixed token budget."""
+    
+    def __init__(
+        self,
+        max_recent_turns: int = MAX_RECENT_TURNS,
+        token_budget: int = MEMORY_TOKEN_BUDGET,
+        summary_budget: int = SUMMARY_TOKEN_BUDGET
+    ):
+        self.max_recent_turns = max_recent_turns
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        
+        self.summary = ""
+        self.turns: deque = deque()
+        self.evicted: List[str] = []
+        self.last_results: List[Dict] = []
+        # _lock guards the fields above; _compact_lock serializes summarizer runs
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+    
+    def is_empty(self) -> bool:
+        return not self.turns and not self.summary and not self.evicted
+    
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.turns.clear()
+            self.evicted = []
+            self.last_results = []
+    
+    def needs_compaction(self) -> bool:
+        return bool(self.evicted)
+    
+    def record_turn(
+        self,
+        question: str,
+        answer: str,
+        results: Optional[List[Dict]] = None,
+        summarize: Optional[Summarizer] = None
+    ):
+        """
+        Add a completed turn, folding turns beyond the window into the summary.
+        
+        Args:
+            question: What the employee asked
+            answer: What the assistant replied
+            results: Chunks the answer was grounded in (reused by same-topic follow-ups)
+            summarize: Fold evicted turns in now with this summarizer; leave
+                None and call compact() later to keep it off the caller's path
+        """
+        with self._lock:
+            self.turns.append({"question": question, "answer": answer})
+            self.last_results = [dict(r) for r in results] if results else []
+            while len(self.turns) > self.max_recent_turns:
+                self.evicted.append(format_turn(self.turns.popleft()))
+        if summarize:
+            self.compact(summarize)
+    
+    def compact(self, summarize: Optional[Summarizer] = None):
+        """
+        Fold evicted turns into the summary.
+        
+        Args:
+            summarize: Incremental summarizer; without one (or if it fails),
+                turns are appended verbatim and clipped to the summary budget
+        """
+        with self._compact_lock:
+            with self._lock:
+                pending = list(self.evicted)
+                summary = self.summary
+            if not pending:
+                return
+            
+            for turn in pending:
+                if summarize:
+                    try:
+                        summary = summarize(summary, turn)
+                    except Exception:
+                        summary = f"{summary}\n{turn}".strip()
+                else:
+                    summary = f"{summary}\n{turn}".strip()
+                summary = _clip_tokens(summary, self.summary_budget, keep_end=True)
+            
+            with self._lock:
+                # clear() may have run meanwhile; only fold what is still pending
+                if self.evicted[:len(pending)] == pending:
+                    self.evicted = self.evicted[len(pending):]
+                    self.summary = summary
+    
+    def amend_answer(self, original: str, revised: str) -> bool:
+        """Replace an answer revised after the fact (async critique); False if it was evicted."""
+        with self._lock:
+            for turn in self.turns:
+                if turn["answer"] == original:
+                    turn["answer"] = revised
+                    return True
+        return False
+    
+    def context(self) -> str:
+        """Conversation context for prompts, newest turns kept first under the budget."""
+        if self.is_empty():
+            return ""
+        
+        with self._lock:
+            earlier = "\n".join([self.summary, *self.evicted]).strip()
+            turns = list(self.turns)
+        
+        parts = []
+        used = 0
+        if earlier:
+            # Turns not yet compacted are shown verbatim, within the summary budget
+            earlier = _clip_tokens(earlier, self.summary_budget, keep_end=True)
+            summary = f"Summary of earlier conversation:\n{earlier}"
+            used = estimate_tokens(summary)
+            parts.append(summary)
+        
+        recent = []
+        for turn in reversed(turns):
+            text = format_turn(turn)
+            cost = estimate_tokens(text)
+            if recent and used + cost > self.token_budget:
+                break
+            recent.append(text)
+            used += cost
+        
+        if recent:
+            parts.append("Recent turns:\n" + "\n\n".join(reversed(recent)))
+        return "\n\n".join(parts)
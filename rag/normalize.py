@@ -0,0 +1,22 @@
+# FILE: rag/normalize.py
+"""
+Question normalization shared by request coalescing and caching.
+"""
+
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Canonical form of a question for exact-match keys.
+
+    Case, punctuation and whitespace differences are ignored, so
+    "How many holidays?" and "how many  holidays" map to the same key.
+    """
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    text = _NON_WORD.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
@@ -1,16 +1,32 @@
 # FILE: rag/pdf.py
 """
 PDF text extraction and chunking for KEITH Manufacturing Handbook.
-The handbook text is embedded directly - no PDF file needed at runtime.
+By default the embedded handbook text is used - no PDF file needed at
+runtime. Given a PDF or a directory of PDFs, pages are extracted in a
+process pool (pypdf) and cached by content hash, so re-runs only pay for
+pages that changed.
 """
 
+import glob
+import hashlib
+import os
 import re
-from typing import List, Dict, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from .topics import tag_chunk
 
 # Chunking parameters
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 250
 
+# PDF extraction
+HANDBOOK_SOURCE_ENV = "HANDBOOK_SOURCE"
+PAGE_CACHE_ENV = "PDF_PAGE_CACHE_DIR"
+DEFAULT_PAGE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "keith-handbook", "pages")
+PAGES_PER_TASK = 8
+
 # Embedded handbook text (extracted from TM-Handbook-Updated-01-2025.pdf)
 HANDBOOK_PAGES = [
     {"page": 1, "text": "Team Member Handbook\n\nKEITH Manufacturing Co.\nWorld Headquarters\n401 NW Adler St\nMadras, OR 97741\n541-475-3802\n\nRevision Date – January 2025"},
@@ -608,23 +624,135 @@ def chunk_text(
     return chunks
 
 
-def extract_pdf_chunks() -> List[Dict]:
+def _pdf_paths(source: str) -> List[str]:
+    """A single PDF, or every PDF in a directory (sorted, so chunk ids are stable)."""
+    if os.path.isdir(source):
+        paths = sorted(
+            p for p in glob.glob(os.path.join(source, "*"))
+            if p.lower().endswith(".pdf") and os.path.isfile(p)
+        )
+        if not paths:
+            raise ValueError(f"No PDF files found in {source}")
+        return paths
+    if not os.path.isfile(source):
+        raise FileNotFoundError(f"PDF source not found: {source}")
+    return [source]
+
+
+def _page_count(path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def _extract_page_range(path: str, start: int, stop: int, cache_dir: Optional[str]) -> List[str]:
+    """Text of pages [start, stop) of one PDF; runs in a worker process."""
+    import pypdf
+    
+    reader = pypdf.PdfReader(path)
+    texts = []
+    for i in range(start, stop):
+        page = reader.pages[i]
+        cache_path = None
+        if cache_dir:
+            contents = page.get_contents()
+            digest = hashlib.sha256(pypdf.__version__.encode("utf-8"))
+            digest.update(contents.get_data() if contents is not None else b"")
+            cache_path = os.path.join(cache_dir, digest.hexdigest() + ".txt")
+            if os.path.exists(cache_path):
+                with open(cache_path, encoding="utf-8") as f:
+                    texts.append(f.read())
+                continue
+        
+        text = page.extract_text() or ""
+        if cache_path:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, cache_path)
+        texts.append(text)
+    return texts
+
+
+def extract_pdf_pages(
+    source: str,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None
+) -> Iterator[Tuple[str, int, str]]:
     """
-    Extract and chunk all text from the embedded handbook.
-    No PDF file needed - uses embedded text.
+    Extract page text from a PDF or a directory of PDFs.
+    
+    Page ranges are extracted in a process pool with a bounded number in
+    flight, and yielded in document order.
+    
+    Args:
+        source: PDF file or directory of PDFs
+        workers: Extraction processes (default: CPU count)
+        cache_dir: Page text cache keyed by content hash
+            (default: $PDF_PAGE_CACHE_DIR or ~/.cache/keith-handbook/pages;
+            "" disables caching)
+        
+    Yields:
+        (path, page_number, text) with 1-based page numbers
     """
-    all_chunks = []
-    global_chunk_id = 0
+    if cache_dir is None:
+        cache_dir = os.environ.get(PAGE_CACHE_ENV, DEFAULT_PAGE_CACHE_DIR)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    tasks = (
+        (path, start, min(start + PAGES_PER_TASK, count))
+        for path in _pdf_paths(source)
+        for count in [_page_count(path)]
+        for start in range(0, count, PAGES_PER_TASK)
+    )
     
-    for page_data in HANDBOOK_PAGES:
-        page_num = page_data["page"]
-        text = page_data["text"]
+    workers = workers or os.cpu_count() or 1
+    window = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
         
-        page_chunks = chunk_text(text, page_num)
+        def drain_one():
+            (path, start, _), future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield path, start + offset + 1, text
+        
+        for task in tasks:
+            pending.append((task, pool.submit(_extract_page_range, *task, cache_dir)))
+            if len(pending) >= window:
+                yield from drain_one()
+        while pending:
+            yield from drain_one()
+
+
+def extract_pdf_chunks(
+    source: Optional[str] = None,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Extract and chunk handbook text, streaming chunks as pages are read.
+    
+    Args:
+        source: PDF file or directory of PDFs; None uses the embedded
+            handbook text (no PDF file needed)
+        workers: Extraction processes for PDF sources
+        cache_dir: Page text cache for PDF sources (see extract_pdf_pages)
         
-        for chunk in page_chunks:
+    Yields:
+        Chunk dicts with sequential chunk ids and topic tags; chunks from
+        PDF sources also carry "source" (the file name)
+    """
+    if source is None:
+        pages = ((None, p["page"], p["text"]) for p in HANDBOOK_PAGES)
+    else:
+        pages = extract_pdf_pages(source, workers=workers, cache_dir=cache_dir)
+    
+    global_chunk_id = 0
+    for path, page_num, text in pages:
+        for chunk in chunk_text(text, page_num):
             chunk["chunk_id"] = f"chunk_{global_chunk_id}"
+            chunk["topics"] = tag_chunk(chunk["text"], chunk["section_title"])
             global_chunk_id += 1
-            all_chunks.append(chunk)
-    
-    return all_chunks
+            if path is not None:
+                chunk["source"] = os.path.basename(path)
+            yield chunk
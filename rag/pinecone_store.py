@@ -7,9 +7,12 @@ from pinecone import Pinecone, ServerlessSpec
 from typing import Optional, Any
 import time
 
+from .chunk_store import ChunkStore, get_chunk_store
+from .embeddings import EMBEDDING_DIMENSION
+from .topics import filter_tags, section_tag
+
 _pc: Optional[Pinecone] = None
 
-EMBEDDING_DIMENSION = 1536
 PINECONE_CLOUD = "aws"
 PINECONE_REGION = "us-east-1"
 
@@ -33,12 +36,24 @@ def create_index_if_not_exists(
     dimension: int = EMBEDDING_DIMENSION,
     metric: str = "cosine"
 ) -> bool:
-    """Create a Pinecone serverless index if it doesn't exist."""
+    """
+    Create a Pinecone serverless index if it doesn't exist.
+    
+    Raises:
+        ValueError: If the index exists with a different dimension
+    """
     pc = get_client()
     
-    existing_indexes = [idx.name for idx in pc.list_indexes()]
+    existing_indexes = {idx.name: idx for idx in pc.list_indexes()}
     
     if index_name in existing_indexes:
+        existing_dimension = existing_indexes[index_name].dimension
+        if existing_dimension != dimension:
+            raise ValueError(
+                f"Pinecone index '{index_name}' has dimension {existing_dimension}, "
+                f"but embeddings are configured for {dimension}. Use a different "
+                f"index name or set EMBEDDING_DIMENSION={existing_dimension}."
+            )
         return False
     
     pc.create_index(
@@ -81,7 +96,12 @@ def upsert_chunks(
     namespace: str,
     batch_size: int = 100
 ) -> int:
-    """Upsert chunk vectors with metadata to Pinecone."""
+    """
+    Upsert chunk vectors to Pinecone.
+    
+    Only small filterable fields go into metadata; chunk text is served
+    from the local chunk store.
+    """
     pc = get_client()
     index = pc.Index(index_name)
     
@@ -91,9 +111,10 @@ def upsert_chunks(
             "id": chunk["chunk_id"],
             "values": embedding,
             "metadata": {
-                "text": chunk["text"][:3000],
                 "page_number": chunk["page_number"],
-                "section_title": chunk["section_title"]
+                "section_title": chunk["section_title"],
+                "section": section_tag(chunk["section_title"]),
+                "topics": list(chunk.get("topics") or [])
             }
         })
     
@@ -111,9 +132,18 @@ def query_similar(
     query_vector: list[float],
     namespace: str,
     top_k: int = 5,
-    include_metadata: bool = True
+    include_metadata: bool = True,
+    chunk_store: Optional[ChunkStore] = None,
+    topics: Optional[list[str]] = None
 ) -> list[dict]:
-    """Query for similar vectors in Pinecone."""
+    """
+    Query for similar vectors in Pinecone.
+    
+    Pinecone returns ids and scores only; with include_metadata the text,
+    page and section are resolved from the local chunk store. With
+    `topics`, only chunks tagged with at least one of them (or untagged) are
+    searched.
+    """
     pc = get_client()
     index = pc.Index(index_name)
     
@@ -121,20 +151,17 @@ def query_similar(
         vector=query_vector,
         namespace=namespace,
         top_k=top_k,
-        include_metadata=include_metadata
+        include_metadata=False,
+        filter={"topics": {"$in": filter_tags(topics)}} if topics else None
     )
     
-    formatted = []
-    for match in results.matches:
-        result = {
-            "chunk_id": match.id,
-            "score": match.score,
-        }
-        if include_metadata and match.metadata:
-            result["text"] = match.metadata.get("text", "")
-            result["page_number"] = match.metadata.get("page_number", 0)
-            result["section_title"] = match.metadata.get("section_title", "")
-        formatted.append(result)
+    formatted = [
+        {"chunk_id": match.id, "score": match.score}
+        for match in results.matches
+    ]
+    
+    if include_metadata:
+        (chunk_store or get_chunk_store()).hydrate(formatted)
     
     return formatted
 
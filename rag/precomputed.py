@@ -0,0 +1,128 @@
+# FILE: rag/precomputed.py
+"""
+Precomputed answers to popular questions for KEITH Handbook Assistant.
+After the handbook is indexed, the warm-up runs the full agent over a list
+of popular questions and stores the results tagged with the index
+fingerprint. Asking one of them again (after normalization) is answered
+instantly, and the questions double as suggestion chips in the UI.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from .normalize import normalize_question
+
+ANSWERS_PATH_ENV = "PRECOMPUTED_ANSWERS_PATH"
+DEFAULT_ANSWERS_PATH = os.path.join(os.path.expanduser("~"), ".cache", "keith-handbook", "precomputed_answers.json")
+
+# Curated list (the README's example questions); warm-up adds the query log's top questions
+POPULAR_QUESTIONS = [
+    "How much vacation do I accrue per pay period in my 3rd year?",
+    "What's the vacation cap and what happens if I hit it?",
+    "What are the 6 paid holidays?",
+    "How do I request time off?",
+    "What's the difference between FMLA and OFLA?",
+    "What's the dress code?",
+    "How does the tardy policy work?",
+    "Who is on the Leadership Team?",
+]
+
+
+def popular_questions(extra: Iterable[str] = ()) -> List[str]:
+    """Curated questions followed by `extra`, without normalized duplicates."""
+    seen = set()
+    questions = []
+    for question in [*POPULAR_QUESTIONS, *extra]:
+        key = normalize_question(question)
+        if key and key not in seen:
+            seen.add(key)
+            questions.append(question)
+    return questions
+
+
+class PrecomputedAnswers:
+    """Answers keyed by normalized question, valid for one index fingerprint (thread-safe)."""
+
+    def __init__(self, fingerprint: str, answers: Optional[Dict[str, Dict]] = None):
+        self.fingerprint = fingerprint
+        self._answers: Dict[str, Dict] = dict(answers or {})
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def __contains__(self, question: str) -> bool:
+        return normalize_question(question) in self._answers
+
+    def lookup(self, question: str) -> Optional[Dict]:
+        """Stored entry (question, answer, sources) for `question`, or None."""
+        return self._answers.get(normalize_question(question))
+
+    def add(self, question: str, answer: str, sources: List[Dict]):
+        with self._lock:
+            self._answers[normalize_question(question)] = {
+                "question": question,
+                "answer": answer,
+                "sources": sources,
+            }
+
+    def questions(self) -> List[str]:
+        """Original wording of every stored question, in insertion order."""
+        return [entry["question"] for entry in list(self._answers.values())]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock:
+            payload = {"fingerprint": self.fingerprint, "answers": self._answers}
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> "PrecomputedAnswers":
+        """Answers saved for `fingerprint`; empty if missing or built for another index."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return cls(fingerprint)
+        if payload.get("fingerprint") != fingerprint:
+            return cls(fingerprint)
+        return cls(fingerprint, payload.get("answers"))
+
+
+def warm_precomputed_answers(
+    agent,
+    store: PrecomputedAnswers,
+    questions: Iterable[str],
+    path: Optional[str] = None
+) -> int:
+    """
+    Answer every question not yet in `store` with the full pipeline.
+
+    Args:
+        agent: AgenticRAG to answer with (ideally with synchronous critique,
+            so stored answers are already reviewed)
+        store: Where answers are added; lookups see them as they land
+        questions: Questions to precompute
+        path: Save the store here after each new answer
+
+    Returns:
+        Number of answers added
+    """
+    added = 0
+    for question in questions:
+        if question in store:
+            continue
+        result = agent.answer(question)
+        # Errors, small talk and "not in the handbook" replies have no sources
+        if not result.get("sources") or result.get("timed_out"):
+            continue
+        store.add(question, result["answer"], result["sources"])
+        added += 1
+        if path:
+            store.save(path)
+    return added
@@ -4,6 +4,10 @@ Prompt templates for KEITH Manufacturing Handbook AI Assistant.
 Optimized for accurate policy interpretation and calculations.
 """
 
+# Bump when a template changes meaning without changing its text
+# (e.g. a parser change); part of every LLM response cache key
+PROMPT_VERSION = 1
+
 PLANNER_SYSTEM_PROMPT = """You are a planning agent for a KEITH Manufacturing Employee Handbook assistant.
 
 Your job is to analyze the user's question and create a plan to answer it.
@@ -14,6 +18,12 @@ Given the user's question, respond with a JSON object containing:
 3. "search_terms": list of key terms to search for in the handbook
 4. "requires_calculation": true/false - does this need math?
 5. "reasoning": brief explanation of your plan
+6. "standalone_question": the user's question rewritten to be fully self-contained using the conversation below (or the question unchanged if there is no conversation)
+7. "same_topic": true/false - is this a follow-up about the same policy topic as the most recent turn?
+8. "topics": the 1-2 handbook topic areas the answer must come from, chosen from [{topics}]; use [] if unsure or the question spans many areas
+
+CONVERSATION SO FAR (use it to resolve follow-ups like "what about year 5?"):
+{conversation}
 
 USER QUESTION: {question}
 
@@ -38,6 +48,27 @@ Analyze these results and respond with JSON:
 Respond ONLY with valid JSON."""
 
 
+EVALUATOR_DELTA_PROMPT = """You are re-evaluating search results for a question about the KEITH Manufacturing Employee Handbook after a follow-up search.
+
+QUESTION: {question}
+
+EARLIER VERDICT (on results already reviewed):
+{previous}
+
+NEW SEARCH RESULTS (not reviewed before):
+{results}
+
+Considering the earlier results together with these new ones, respond with JSON:
+{{
+    "sufficient": true/false,
+    "confidence": 0.0-1.0,
+    "missing_info": "what information is still needed, if any",
+    "suggested_search": "alternative search query if needed, or null"
+}}
+
+Respond ONLY with valid JSON."""
+
+
 ANSWER_SYSTEM_PROMPT = """You are an expert HR assistant for KEITH Manufacturing employees.
 
 YOUR TASK:
@@ -132,12 +163,16 @@ HANDBOOK CONTEXT:
 PROPOSED ANSWER:
 {answer}
 
+LOCAL CHECKS FLAGGED:
+{flags}
+
 CRITICAL CHECKS:
 1. If the answer includes a CALCULATION, verify it respects ALL policy caps and limits
 2. Check vacation cap violations (150% of annual accrual)
 3. Look for contradictions (e.g., saying "you'll have 122 hours" when the cap is 120 hours)
 4. Ensure the answer directly addresses what the employee asked
 5. Verify page number citations are reasonable
+6. Confirm or dismiss each locally flagged item above
 
 Evaluate and respond with JSON:
 {{
@@ -154,6 +189,17 @@ If the answer gives a number that exceeds a stated cap, set violates_policy_cap
 Respond ONLY with valid JSON."""
 
 
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a KEITH Manufacturing employee and the handbook assistant.
+
+CURRENT SUMMARY:
+{summary}
+
+EXCHANGE TO FOLD IN:
+{turn}
+
+Write the updated summary in at most {max_words} words. Keep facts the employee stated about themselves (tenure, role, schedule), the policies discussed, and any numbers the assistant gave. Respond with the summary text only."""
+
+
 def format_chunks_for_prompt(chunks: list[dict]) -> str:
     """Format retrieved chunks for inclusion in prompts."""
     formatted_parts = []
@@ -180,3 +226,17 @@ def format_chunks_for_evaluation(chunks: list[dict]) -> str:
         formatted_parts.append(f"[Page {page}, Score: {score:.2f}]\n{text}...")
     
     return "\n\n".join(formatted_parts)
+
+
+def format_evaluation_summary(evaluation: dict, judged: list[dict]) -> str:
+    """Compact recap of an earlier evaluation for the incremental evaluator."""
+    reviewed = "; ".join(
+        f"Page {c.get('page_number', '?')} ({c.get('section_title', 'Unknown')})"
+        for c in judged
+    )
+    return (
+        f"Sufficient: {evaluation.get('sufficient')}, "
+        f"Confidence: {evaluation.get('confidence', 0):.2f}\n"
+        f"Missing: {evaluation.get('missing_info') or 'nothing noted'}\n"
+        f"Already reviewed: {reviewed or 'none'}"
+    )
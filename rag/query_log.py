@@ -0,0 +1,310 @@
+# FILE: rag/query_log.py
+"""
+Persistent query log and analytics for KEITH Handbook Assistant.
+Every answered question is appended to a local SQLite file by a background
+writer, off the request path. Rollups over the log drive cache sizing,
+the precomputed-answer list and model tiering:
+
+    python -m rag.query_log report --hours 168
+    python -m rag.query_log top --limit 20
+
+Set QUERY_LOG_PATH to choose the file (empty disables logging).
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+QUERY_LOG_ENV = "QUERY_LOG_PATH"
+DEFAULT_QUERY_LOG_PATH = os.path.join(os.path.expanduser("~"), ".cache", "keith-handbook", "query_log.sqlite3")
+MAX_PENDING = 10_000
+WRITE_BATCH = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    ts REAL NOT NULL,
+    question TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    served_from TEXT NOT NULL,
+    follow_up INTEGER NOT NULL,
+    coalesced INTEGER NOT NULL,
+    revised INTEGER NOT NULL,
+    total_seconds REAL,
+    timings TEXT NOT NULL,
+    skipped TEXT NOT NULL,
+    chunk_ids TEXT NOT NULL,
+    llm_calls INTEGER NOT NULL,
+    llm_cache_hits INTEGER NOT NULL,
+    speculation TEXT NOT NULL DEFAULT '',
+    review_id TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS queries_ts ON queries (ts);
+"""
+# Columns added after the first release, for logs created before them
+_ADDED_COLUMNS = {
+    "speculation": "ALTER TABLE queries ADD COLUMN speculation TEXT NOT NULL DEFAULT ''",
+    "review_id": "ALTER TABLE queries ADD COLUMN review_id TEXT NOT NULL DEFAULT ''",
+}
+_COLUMNS = (
+    "ts", "question", "normalized", "served_from", "follow_up", "coalesced", "revised",
+    "total_seconds", "timings", "skipped", "chunk_ids", "llm_calls", "llm_cache_hits",
+    "speculation", "review_id",
+)
+_INSERT = f"INSERT INTO queries ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})"
+# Background reviews (async critique) finish after their row is written
+_MARK_REVISED = "UPDATE queries SET revised = 1 WHERE review_id = ?"
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def log_row(
+    question: str,
+    normalized: str,
+    result: Dict,
+    follow_up: bool = False,
+    coalesced: bool = False
+) -> Tuple:
+    """Flatten one AgenticRAG result into a queries row."""
+    step_types = {step.get("type") for step in result.get("reasoning_steps", [])}
+    if "precomputed" in step_types:
+        served_from = "precomputed"
+    elif "intent" in step_types:
+        served_from = "intent"
+    else:
+        served_from = "pipeline"
+    timings = dict(result.get("timings", {}))
+    return (
+        time.time(),
+        question,
+        normalized,
+        served_from,
+        int(follow_up),
+        int(coalesced),
+        int("revision" in step_types),
+        timings.pop("total", None),
+        json.dumps(timings),
+        json.dumps(result.get("skipped_stages", [])),
+        json.dumps([s.get("chunk_id") for s in result.get("sources", [])]),
+        result.get("llm_calls", 0),
+        result.get("llm_cache_hits", 0),
+        result.get("speculation", ""),
+        result.get("review_id", ""),
+    )
+
+
+class QueryLog:
+    """Append-only SQLite query log with a background writer (thread-safe)."""
+
+    def __init__(self, path: str, max_pending: int = MAX_PENDING):
+        self.path = path
+        self.dropped = 0
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as db:
+            db.executescript(_SCHEMA)
+            existing = {row[1] for row in db.execute("PRAGMA table_info(queries)")}
+            for column, ddl in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    db.execute(ddl)
+            db.execute("CREATE INDEX IF NOT EXISTS queries_review ON queries (review_id) WHERE review_id != ''")
+            db.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="rag-query-log", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def _enqueue(self, statement: str, params: Tuple):
+        try:
+            self._pending.put_nowait((statement, params))
+        except queue.Full:
+            self.dropped += 1
+
+    def record(self, row: Tuple):
+        """Queue one row (see log_row); never blocks the request."""
+        self._enqueue(_INSERT, row)
+
+    def record_review(self, review_id: str, amended: bool):
+        """Apply a background review's outcome to the rows logged with `review_id`."""
+        if review_id and amended:
+            self._enqueue(_MARK_REVISED, (review_id,))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            items = [self._pending.get()]
+            while len(items) < WRITE_BATCH:
+                try:
+                    items.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Queue order is kept, so a review update follows its row's insert
+                for statement, params in items:
+                    db.execute(statement, params)
+                db.commit()
+            except sqlite3.Error:
+                self.dropped += len(items)
+            finally:
+                for _ in items:
+                    self._pending.task_done()
+
+    def flush(self):
+        """Block until every queued row is written."""
+        self._pending.join()
+
+    def _rows(self, since: Optional[float], columns: str) -> List[Tuple]:
+        with closing(self._connect()) as db:
+            return db.execute(
+                f"SELECT {columns} FROM queries WHERE ts >= ?", (since or 0.0,)
+            ).fetchall()
+
+    def top_questions(self, limit: int = 10, since: Optional[float] = None, min_count: int = 1) -> List[Tuple[str, int]]:
+        """Most asked standalone questions as (most recent wording, count)."""
+        with closing(self._connect()) as db:
+            return db.execute(
+                "SELECT question, n FROM ("
+                " SELECT normalized, COUNT(*) AS n, MAX(ts) AS last FROM queries"
+                " WHERE ts >= ? AND follow_up = 0 AND served_from != 'intent' AND normalized != ''"
+                " GROUP BY normalized HAVING n >= ?"
+                ") AS counts JOIN queries q ON q.normalized = counts.normalized AND q.ts = counts.last"
+                " ORDER BY n DESC, last DESC LIMIT ?",
+                (since or 0.0, min_count, limit)
+            ).fetchall()
+
+    def stage_latencies(self, since: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Count, p50, p90 and p99 seconds per pipeline stage (and "total")."""
+        samples: Dict[str, List[float]] = {}
+        for timings, total in self._rows(since, "timings, total_seconds"):
+            for stage, seconds in json.loads(timings).items():
+                samples.setdefault(stage, []).append(seconds)
+            if total is not None:
+                samples.setdefault("total", []).append(total)
+        report = {}
+        for stage, values in samples.items():
+            values.sort()
+            report[stage] = {
+                "count": len(values),
+                "p50": _percentile(values, 50),
+                "p90": _percentile(values, 90),
+                "p99": _percentile(values, 99),
+            }
+        return report
+
+    def chunk_hits(self, limit: int = 10, since: Optional[float] = None) -> List[Tuple[str, int]]:
+        """Chunks cited most often as sources."""
+        counts: Counter = Counter()
+        for (chunk_ids,) in self._rows(since, "chunk_ids"):
+            counts.update(c for c in json.loads(chunk_ids) if c)
+        return counts.most_common(limit)
+
+    def hit_rates(self, since: Optional[float] = None) -> Dict[str, float]:
+        """Shares of questions served without the full pipeline, plus LLM cache, revision and wasted-draft rates."""
+        rows = self._rows(since, "served_from, coalesced, revised, llm_calls, llm_cache_hits, speculation")
+        total = len(rows)
+        if not total:
+            return {"questions": 0}
+        pipeline = [r for r in rows if r[0] == "pipeline"]
+        calls = sum(r[3] for r in rows)
+        drafts = [r[5] for r in rows if r[5]]
+        return {
+            "questions": total,
+            "precomputed": sum(1 for r in rows if r[0] == "precomputed") / total,
+            "intent": sum(1 for r in rows if r[0] == "intent") / total,
+            "coalesced": sum(r[1] for r in rows) / total,
+            "revised": sum(r[2] for r in pipeline) / len(pipeline) if pipeline else 0.0,
+            "llm_cache": sum(r[4] for r in rows) / calls if calls else 0.0,
+            "draft_wasted": 1.0 - drafts.count("kept") / len(drafts) if drafts else 0.0,
+        }
+
+    def report(self, since: Optional[float] = None, limit: int = 10) -> Dict:
+        return {
+            "hit_rates": self.hit_rates(since),
+            "stage_latencies": self.stage_latencies(since),
+            "top_questions": self.top_questions(limit, since),
+            "chunk_hits": self.chunk_hits(limit, since),
+        }
+
+
+_log: Optional[QueryLog] = None
+_log_lock = threading.Lock()
+_log_loaded = False
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """Process-wide log at $QUERY_LOG_PATH (default under ~/.cache); None if disabled."""
+    global _log, _log_loaded
+    with _log_lock:
+        if not _log_loaded:
+            path = os.environ.get(QUERY_LOG_ENV, DEFAULT_QUERY_LOG_PATH)
+            _log = QueryLog(path) if path else None
+            if _log is not None:
+                atexit.register(_log.flush)
+            _log_loaded = True
+        return _log
+
+
+def _print_report(report: Dict):
+    rates = report["hit_rates"]
+    print(f"Questions: {rates.get('questions', 0)}")
+    for name in ("precomputed", "intent", "coalesced", "revised", "llm_cache", "draft_wasted"):
+        if name in rates:
+            print(f"  {name:<12} {rates[name]:6.1%}")
+
+    print("\nStage latency (seconds)")
+    for stage, stats in sorted(report["stage_latencies"].items()):
+        print(f"  {stage:<12} n={stats['count']:<6} p50={stats['p50']:.2f} p90={stats['p90']:.2f} p99={stats['p99']:.2f}")
+
+    print("\nTop questions")
+    for question, count in report["top_questions"]:
+        print(f"  {count:>5}  {question}")
+
+    print("\nMost cited chunks")
+    for chunk_id, count in report["chunk_hits"]:
+        print(f"  {count:>5}  {chunk_id}")
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Report on the query log")
+    parser.add_argument("--path", default=os.environ.get(QUERY_LOG_ENV, DEFAULT_QUERY_LOG_PATH))
+    parser.add_argument("--hours", type=float, help="Only include the last N hours")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="Hit rates, stage latencies, top questions and chunks")
+    top = sub.add_parser("top", help="Top questions, one per line (warm-up list input)")
+    top.add_argument("--min-count", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    log = QueryLog(args.path)
+    since = time.time() - args.hours * 3600 if args.hours else None
+    if args.command == "top":
+        rows = log.top_questions(args.limit, since, min_count=args.min_count)
+        if args.json:
+            print(json.dumps([{"question": q, "count": n} for q, n in rows], indent=2))
+        else:
+            for question, _ in rows:
+                print(question)
+        return
+
+    report = log.report(since, args.limit)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+# FILE: rag/ratelimit.py
+"""
+Process-wide rate-limit scheduler for OpenAI calls.
+Token buckets track requests and tokens per minute for each model.
+Interactive calls are admitted ahead of background work, 429s honor
+Retry-After, and other transient failures back off with full jitter.
+
+Budgets start from OPENAI_RATE_LIMITS ("gpt-4o=5000:800000,...", as
+model=rpm:tpm) or the defaults below, then follow the account's real
+limits as reported in each response's x-ratelimit-limit-* headers.
+"""
+
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import openai
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+RATE_LIMITS_ENV = "OPENAI_RATE_LIMITS"
+
+# (requests per minute, tokens per minute) until the API reports the real ones
+DEFAULT_MODEL_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gpt-4o": (5_000, 800_000),
+    "gpt-4o-mini": (5_000, 2_000_000),
+    "text-embedding-3-small": (5_000, 1_000_000),
+    "text-embedding-3-large": (5_000, 1_000_000),
+}
+FALLBACK_MODEL_LIMITS = (500, 200_000)
+
+# Completion tokens admitted before a model's actual usage has been seen;
+# afterwards a moving average is used (never more than max_tokens)
+DEFAULT_COMPLETION_ESTIMATE = 500
+COMPLETION_SMOOTHING = 0.2
+
+MAX_RETRIES = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for admission."""
+    return max(1, len(text or "") // 4)
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse "model=rpm:tpm,model=rpm:tpm" (as in $OPENAI_RATE_LIMITS)."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            model, budget = item.split("=", 1)
+            rpm, tpm = budget.split(":", 1)
+            limits[model.strip()] = (int(rpm), int(tpm))
+        except ValueError:
+            raise ValueError(f"Invalid {RATE_LIMITS_ENV} entry {item!r}; expected model=rpm:tpm")
+    return limits
+
+
+def _header_limits(headers) -> Optional[Tuple[int, int]]:
+    """(rpm, tpm) from x-ratelimit-limit-* response headers, if present."""
+    try:
+        rpm = int(headers.get("x-ratelimit-limit-requests"))
+        tpm = int(headers.get("x-ratelimit-limit-tokens"))
+    except (TypeError, ValueError):
+        return None
+    return (rpm, tpm) if rpm > 0 and tpm > 0 else None
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read Retry-After (or retry-after-ms) from an OpenAI error response."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized to one minute of capacity."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Return (positive) or charge (negative) tokens after the fact."""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+    def resize(self, per_minute: float, now: float):
+        """Change capacity, keeping the bucket's current fill level."""
+        self._refill(now)
+        fill = self.tokens / self.capacity if self.capacity else 1.0
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = fill * self.capacity
+
+
+class _ModelState:
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiters: list = []
+        self.blocked_until = 0.0
+        self.completion_average: Optional[float] = None
+
+
+class RateLimitScheduler:
+    """Admits OpenAI calls against per-model RPM/TPM budgets."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        max_retries: int = MAX_RETRIES,
+        base_backoff: float = BASE_BACKOFF,
+        max_backoff: float = MAX_BACKOFF,
+        learn_limits: bool = True
+    ):
+        self.limits = dict(DEFAULT_MODEL_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        # False pins the configured budgets (e.g. a share of the account)
+        self.learn_limits = learn_limits
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._models: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            rpm, tpm = self.limits.get(model, FALLBACK_MODEL_LIMITS)
+            state = _ModelState(rpm, tpm)
+            self._models[model] = state
+        return state
+
+    def set_limits(self, model: str, rpm: int, tpm: int):
+        """Change the budget for one model (resets its buckets)."""
+        with self._cond:
+            self.limits[model] = (rpm, tpm)
+            state = self._models.get(model)
+            if state is not None:
+                state.requests = TokenBucket(rpm)
+                state.tokens = TokenBucket(tpm)
+            self._cond.notify_all()
+
+    def observe_headers(self, model: str, headers):
+        """Follow the account limits the API reported for `model`."""
+        if not self.learn_limits or headers is None:
+            return
+        limits = _header_limits(headers)
+        if limits is None:
+            return
+        with self._cond:
+            if self.limits.get(model) == limits and model in self._models:
+                return
+            self.limits[model] = limits
+            state = self._state(model)
+            now = time.monotonic()
+            state.requests.resize(limits[0], now)
+            state.tokens.resize(limits[1], now)
+            self._cond.notify_all()
+
+    def completion_estimate(self, model: str, max_tokens: int) -> int:
+        """Completion tokens to admit a call with (settled against actual usage)."""
+        with self._cond:
+            average = self._state(model).completion_average
+        estimate = DEFAULT_COMPLETION_ESTIMATE if average is None else int(average) + 1
+        return min(max_tokens, estimate)
+
+    def _observe_usage(self, model: str, usage):
+        completion = getattr(usage, "completion_tokens", None)
+        if not isinstance(completion, int):
+            return
+        with self._cond:
+            state = self._state(model)
+            if state.completion_average is None:
+                state.completion_average = float(completion)
+            else:
+                state.completion_average += COMPLETION_SMOOTHING * (completion - state.completion_average)
+
+    def acquire(
+        self,
+        model: str,
+        tokens: int,
+        priority: int = PRIORITY_INTERACTIVE,
+        timeout: Optional[float] = None
+    ):
+        """
+        Block until one request and `tokens` tokens are available for `model`.
+
+        Waiters are served strictly by (priority, arrival), so background work
+        never overtakes a queued interactive call.
+
+        Raises:
+            TimeoutError: If capacity is not granted within `timeout` seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = (priority, next(self._seq))
+
+        with self._cond:
+            state = self._state(model)
+            heapq.heappush(state.waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if state.waiters[0] == ticket:
+                        wait = max(
+                            state.blocked_until - now,
+                            state.requests.wait_time(1, now),
+                            state.tokens.wait_time(tokens, now)
+                        )
+                        if wait <= 0:
+                            state.requests.take(1, now)
+                            state.tokens.take(tokens, now)
+                            return
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise TimeoutError(
+                                f"Timed out waiting for rate limit capacity on {model}"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    self._cond.wait(wait)
+            finally:
+                if ticket in state.waiters:
+                    state.waiters.remove(ticket)
+                    heapq.heapify(state.waiters)
+                self._cond.notify_all()
+
+    def penalize(self, model: str, delay: float):
+        """Hold all calls for `model` for `delay` seconds (server said 429)."""
+        with self._cond:
+            state = self._state(model)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+    def settle(self, model: str, estimated: int, actual: int):
+        """Reconcile the token bucket with the usage the API reported."""
+        with self._cond:
+            self._state(model).tokens.adjust(estimated - actual)
+            self._cond.notify_all()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def call(
+        self,
+        model: str,
+        fn: Callable[[], Any],
+        tokens: int,
+        priority: int = PRIORITY_INTERACTIVE,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_timeouts: bool = True
+    ) -> Any:
+        """
+        Run `fn` under the model's budget, retrying transient failures.
+
+        Args:
+            model: Model name the budget is tracked under
+            fn: Zero-argument callable performing the API request
+            tokens: Estimated prompt + completion tokens for admission
+                (see completion_estimate)
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+            timeout: Overall seconds allowed for waiting and retries
+            max_retries: Override the scheduler's retry count
+            retry_timeouts: False to surface request timeouts immediately
+                (callers with their own fallback handle them)
+
+        Returns:
+            Whatever `fn` returns; raw responses (with_raw_response) also
+            update the model's limits from their headers
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        for attempt in range(retries + 1):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            self.acquire(model, tokens, priority, timeout=remaining)
+            try:
+                response = fn()
+            except RETRYABLE_ERRORS as e:
+                self.observe_headers(model, getattr(getattr(e, "response", None), "headers", None))
+                if attempt >= retries or getattr(e, "code", None) == "insufficient_quota":
+                    raise
+                if not retry_timeouts and isinstance(e, openai.APITimeoutError):
+                    raise
+                delay = _retry_after_seconds(e)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise
+                if isinstance(e, openai.RateLimitError):
+                    # Hold every caller of this model instead of letting each retry into another 429
+                    self.penalize(model, delay)
+                else:
+                    time.sleep(delay)
+                continue
+
+            self.observe_headers(model, getattr(response, "headers", None))
+            parsed = response.parse() if hasattr(response, "parse") else response
+            usage = getattr(parsed, "usage", None)
+            actual = getattr(usage, "total_tokens", None)
+            if isinstance(actual, int):
+                self.settle(model, tokens, actual)
+            self._observe_usage(model, usage)
+            return response
+
+
+_scheduler: Optional[RateLimitScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Get the process-wide scheduler, creating it on first use from $OPENAI_RATE_LIMITS."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler(limits=parse_limits(os.environ.get(RATE_LIMITS_ENV, "")))
+        return _scheduler
+
+
+def configure_scheduler(
+    limits: Optional[Dict[str, Tuple[int, int]]] = None,
+    **kwargs
+) -> RateLimitScheduler:
+    """Replace the process-wide scheduler, e.g. to match account limits."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = RateLimitScheduler(limits=limits, **kwargs)
+        return _scheduler
@@ -0,0 +1,403 @@
+# FILE: rag/server.py
+"""
+Headless HTTP API for KEITH Handbook Assistant.
+
+    python -m rag.server --port 8080
+
+Endpoints:
+    POST /answer    {"question": "..."} -> JSON result. Send
+                    "Accept: text/event-stream" (or ?stream=1) to receive
+                    status events followed by the result as server-sent events.
+    GET  /healthz   Process is up
+    GET  /readyz    Warm-up finished and the shared agent is ready
+    GET  /metrics   Prometheus text format
+
+Configuration comes from the same names as the Streamlit secrets
+(OPENAI_API_KEY, PINECONE_API_KEY, PINECONE_INDEX_NAME) plus
+PINECONE_NAMESPACE and LOCAL_INDEX_DIR, read from the environment.
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .agent import SpeculationStats, speculation_stats
+from .llm_cache import get_llm_cache
+from .tiering import get_latency_tracker
+from .warmup import DEFAULT_NAMESPACE, start_warmup
+
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_TIMEOUT = 60.0
+MAX_QUESTION_CHARS = 2000
+LATENCY_BUDGET_SHARE = 0.8
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+
+
+class ServiceMetrics:
+    """Thread-safe counters rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses: Dict[int, int] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.latency_counts = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+
+    def record_response(self, status: int):
+        with self._lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def observe_latency(self, seconds: float):
+        with self._lock:
+            self.latency_sum += seconds
+            self.latency_count += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_counts[i] += 1
+
+    def adjust(self, in_flight: int = 0, queued: int = 0):
+        with self._lock:
+            self.in_flight += in_flight
+            self.queued += queued
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# TYPE handbook_answer_responses_total counter",
+                *[
+                    f'handbook_answer_responses_total{{status="{status}"}} {count}'
+                    for status, count in sorted(self.responses.items())
+                ],
+                "# TYPE handbook_answer_in_flight gauge",
+                f"handbook_answer_in_flight {self.in_flight}",
+                "# TYPE handbook_answer_queued gauge",
+                f"handbook_answer_queued {self.queued}",
+                "# TYPE handbook_answer_latency_seconds histogram",
+                *[
+                    f'handbook_answer_latency_seconds_bucket{{le="{bound}"}} {count}'
+                    for bound, count in zip(LATENCY_BUCKETS, self.latency_counts)
+                ],
+                f'handbook_answer_latency_seconds_bucket{{le="+Inf"}} {self.latency_count}',
+                f"handbook_answer_latency_seconds_sum {self.latency_sum:.6f}",
+                f"handbook_answer_latency_seconds_count {self.latency_count}",
+            ]
+
+        lines.append("# TYPE handbook_model_latency_seconds gauge")
+        lines.append("# TYPE handbook_model_timeouts_total counter")
+        for model, stats in sorted(get_latency_tracker().snapshot().items()):
+            for quantile in ("p50", "p90"):
+                lines.append(
+                    f'handbook_model_latency_seconds{{model="{model}",quantile="{quantile}"}} {stats[quantile]:.3f}'
+                )
+            lines.append(f'handbook_model_timeouts_total{{model="{model}"}} {stats["timeouts"]}')
+        
+        cache = get_llm_cache()
+        if cache is not None:
+            lines.append("# TYPE handbook_llm_cache_hits_total counter")
+            lines.append("# TYPE handbook_llm_cache_misses_total counter")
+            lines.append("# TYPE handbook_llm_cache_entries gauge")
+            for stage, stats in sorted(cache.stats().items()):
+                lines.append(f'handbook_llm_cache_hits_total{{stage="{stage}"}} {stats["hits"]}')
+                lines.append(f'handbook_llm_cache_misses_total{{stage="{stage}"}} {stats["misses"]}')
+                lines.append(f'handbook_llm_cache_entries{{stage="{stage}"}} {stats["entries"]}')
+        
+        speculation = speculation_stats()
+        lines.append("# TYPE handbook_speculative_drafts_total counter")
+        for outcome in SpeculationStats.OUTCOMES:
+            lines.append(f'handbook_speculative_drafts_total{{outcome="{outcome}"}} {speculation[outcome]}')
+        lines.append("# TYPE handbook_speculative_wasted_seconds_total counter")
+        lines.append(f"handbook_speculative_wasted_seconds_total {speculation['wasted_seconds']:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+class ServiceBusy(Exception):
+    """Raised when the worker pool and its queue are both full."""
+
+
+class AnswerService:
+    """Shared agent behind a bounded worker pool with a queue-depth limit."""
+
+    def __init__(
+        self,
+        openai_api_key: str,
+        pinecone_api_key: str,
+        index_name: str,
+        namespace: str,
+        local_index_dir: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        timeout: float = DEFAULT_TIMEOUT,
+        latency_budget: Optional[float] = None,
+        speculative: bool = False
+    ):
+        self.timeout = timeout
+        # The agent degrades (skips optional stages) before the HTTP timeout hits
+        self.latency_budget = latency_budget or timeout * LATENCY_BUDGET_SHARE
+        self.metrics = ServiceMetrics()
+        self.agent_future = start_warmup(
+            openai_api_key=openai_api_key,
+            pinecone_api_key=pinecone_api_key,
+            index_name=index_name,
+            namespace=namespace,
+            local_index_dir=local_index_dir,
+            speculative=speculative
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-answer")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def is_ready(self) -> bool:
+        return self.agent_future.done() and self.agent_future.exception() is None
+
+    def submit(self, question: str, on_status=None):
+        """
+        Queue a question for the worker pool.
+
+        Raises:
+            ServiceBusy: If all workers are busy and the queue is full
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy("Too many requests in progress")
+        self.metrics.adjust(queued=1)
+
+        def run():
+            self.metrics.adjust(in_flight=1, queued=-1)
+            try:
+                agent = self.agent_future.result()
+                return agent.answer(
+                    question,
+                    status_callback=on_status,
+                    latency_budget=self.latency_budget
+                )
+            finally:
+                self.metrics.adjust(in_flight=-1)
+
+        def release(future):
+            # Also runs for requests cancelled (timed out) before a worker picked them up
+            if future.cancelled():
+                self.metrics.adjust(queued=-1)
+            self._slots.release()
+
+        future = self._executor.submit(run)
+        future.add_done_callback(release)
+        return future
+
+
+class AnswerHandler(BaseHTTPRequestHandler):
+    """Routes requests to the AnswerService attached to the server."""
+
+    server_version = "KeithHandbookAPI/1.0"
+
+    @property
+    def service(self) -> AnswerService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.service.metrics.record_response(status)
+
+    def _send_text(self, status: int, text: str, content_type: str = "text/plain; charset=utf-8"):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/healthz":
+            self._send_text(200, "ok\n")
+        elif path == "/readyz":
+            if self.service.is_ready():
+                self._send_text(200, "ready\n")
+            else:
+                self._send_text(503, "warming up\n")
+        elif path == "/metrics":
+            self._send_text(200, self.service.metrics.render(), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/answer":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        question = self._read_question()
+        if question is None:
+            return
+
+        stream = (
+            "text/event-stream" in self.headers.get("Accept", "")
+            or parse_qs(url.query).get("stream", ["0"])[0] in ("1", "true")
+        )
+        if stream:
+            self._answer_stream(question)
+        else:
+            self._answer_json(question)
+
+    def _read_question(self) -> Optional[str]:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "body must be JSON"})
+            return None
+
+        question = payload.get("question") if isinstance(payload, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            self._send_json(400, {"error": "'question' is required"})
+            return None
+        if len(question) > MAX_QUESTION_CHARS:
+            self._send_json(413, {"error": f"'question' exceeds {MAX_QUESTION_CHARS} characters"})
+            return None
+        return question.strip()
+
+    def _answer_json(self, question: str):
+        if not self.service.is_ready():
+            self._send_json(503, {"error": "service is warming up"})
+            return
+
+        started = time.monotonic()
+        try:
+            future = self.service.submit(question)
+        except ServiceBusy as e:
+            self._send_json(503, {"error": str(e)})
+            return
+
+        try:
+            result = future.result(timeout=self.service.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._send_json(504, {"error": "timed out"})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        self.service.metrics.observe_latency(time.monotonic() - started)
+        self._send_json(200, result)
+
+    def _answer_stream(self, question: str):
+        if not self.service.is_ready():
+            self._send_json(503, {"error": "service is warming up"})
+            return
+
+        events: queue.Queue = queue.Queue()
+        started = time.monotonic()
+        try:
+            future = self.service.submit(question, on_status=lambda m: events.put(("status", {"message": m})))
+        except ServiceBusy as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        future.add_done_callback(lambda f: events.put(("done", None)))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        deadline = started + self.service.timeout
+        status = 200
+        try:
+            while True:
+                try:
+                    kind, data = events.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    future.cancel()
+                    status = 504
+                    self._write_event("error", {"error": "timed out"})
+                    break
+
+                if kind == "status":
+                    if data["message"]:
+                        self._write_event("status", data)
+                    continue
+
+                try:
+                    self._write_event("result", future.result())
+                    self.service.metrics.observe_latency(time.monotonic() - started)
+                except Exception as e:
+                    status = 500
+                    self._write_event("error", {"error": str(e)})
+                break
+        except (BrokenPipeError, ConnectionResetError):
+            status = 499
+        self.service.metrics.record_response(status)
+
+    def _write_event(self, event: str, data: dict):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def create_server(
+    host: str,
+    port: int,
+    service: AnswerService
+) -> ThreadingHTTPServer:
+    """Build the HTTP server with `service` attached to it."""
+    server = ThreadingHTTPServer((host, port), AnswerHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="KEITH Handbook Assistant HTTP API")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Concurrent answer() calls")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Requests allowed to wait for a worker before returning 503")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconds before a request returns 504")
+    parser.add_argument("--latency-budget", type=float,
+                        help="Seconds the agent aims to finish in, skipping optional "
+                             f"stages if needed (default {LATENCY_BUDGET_SHARE:.0%} of --timeout)")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Draft the answer while the evaluator runs; redo it if the search is refined")
+    args = parser.parse_args(argv)
+
+    service = AnswerService(
+        openai_api_key=os.environ["OPENAI_API_KEY"],
+        pinecone_api_key=os.environ["PINECONE_API_KEY"],
+        index_name=os.environ["PINECONE_INDEX_NAME"],
+        namespace=os.environ.get("PINECONE_NAMESPACE", DEFAULT_NAMESPACE),
+        local_index_dir=os.environ.get("LOCAL_INDEX_DIR"),
+        workers=args.workers,
+        max_queue=args.max_queue,
+        timeout=args.timeout,
+        latency_budget=args.latency_budget,
+        speculative=args.speculative
+    )
+    server = create_server(args.host, args.port, service)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
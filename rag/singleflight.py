@@ -0,0 +1,114 @@
+# FILE: rag/singleflight.py
+"""
+Single-flight coalescing of identical in-flight work.
+Concurrent callers with the same key share one computation and its result;
+progress events emitted by the computation are replayed to every waiter
+on the waiter's own thread.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ProgressCallback = Callable[[Any], None]
+
+
+class _Call:
+    def __init__(self):
+        self.done = False
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.events: list = []
+        self.waiters = 1
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def in_flight(self) -> int:
+        """Number of distinct computations currently running."""
+        with self._cond:
+            return len(self._calls)
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[ProgressCallback], Any],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Run `fn(emit)` once per key, or attach to the run already in flight.
+
+        Args:
+            key: Coalescing key
+            fn: Computation; receives an `emit(event)` callable for progress
+            on_progress: Called with every progress event of the computation
+
+        Returns:
+            (result, shared) where `shared` is True for callers that attached
+            to another caller's computation. Shared results are the same
+            object for every waiter; copy before mutating.
+        """
+        with self._cond:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if leader:
+            return self._run(key, call, fn, on_progress), False
+        return self._wait(call, on_progress), True
+
+    def _run(
+        self,
+        key: str,
+        call: _Call,
+        fn: Callable[[ProgressCallback], Any],
+        on_progress: Optional[ProgressCallback]
+    ) -> Any:
+        def emit(event: Any):
+            with self._cond:
+                call.events.append(event)
+                self._cond.notify_all()
+            if on_progress:
+                on_progress(event)
+
+        try:
+            call.result = fn(emit)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._cond:
+                call.done = True
+                self._calls.pop(key, None)
+                self._cond.notify_all()
+
+    def _wait(self, call: _Call, on_progress: Optional[ProgressCallback]) -> Any:
+        seen = 0
+        while True:
+            with self._cond:
+                while not call.done and seen == len(call.events):
+                    self._cond.wait()
+                pending = call.events[seen:]
+                seen = len(call.events)
+                done = call.done
+
+            if on_progress:
+                for event in pending:
+                    on_progress(event)
+            if done:
+                break
+
+        if call.error is not None:
+            raise call.error
+        return call.result
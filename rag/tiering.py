@@ -0,0 +1,119 @@
+# FILE: rag/tiering.py
+"""
+Per-stage model tiering for KEITH Handbook Assistant.
+JSON-only stages (planner, evaluator, critique, summary) default to a
+smaller, faster model; the final answer keeps the strongest one. When a
+call exceeds its stage timeout it is retried on the fast tier, and a model
+whose tracked p90 latency is over the timeout is bypassed (with periodic
+probes so it can recover).
+"""
+
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+STRONG_MODEL = "gpt-4o"
+FAST_MODEL = "gpt-4o-mini"
+
+DEFAULT_STAGE_MODELS = {
+    "planner": FAST_MODEL,
+    "evaluator": FAST_MODEL,
+    "critique": FAST_MODEL,
+    "summary": FAST_MODEL,
+    "answer": STRONG_MODEL,
+}
+# Seconds allowed on the primary model before falling back
+DEFAULT_STAGE_TIMEOUTS = {
+    "planner": 8.0,
+    "evaluator": 8.0,
+    "critique": 10.0,
+    "summary": 10.0,
+    "answer": 30.0,
+}
+FALLBACK_TIMEOUT = 30.0
+
+LATENCY_WINDOW = 100
+MIN_SAMPLES = 10
+PROBE_INTERVAL = 20
+
+
+class LatencyTracker:
+    """Recent call latencies per model (thread-safe)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._window = window
+
+    def record(self, model: str, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self._window)).append(seconds)
+            if timed_out:
+                self._timeouts[model] = self._timeouts.get(model, 0) + 1
+
+    def percentile(self, model: str, p: float) -> Optional[float]:
+        """p-th percentile (0-100) of recent latencies, None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Count, p50, p90 and timeout count per model."""
+        with self._lock:
+            models = {m: sorted(s) for m, s in self._samples.items()}
+            timeouts = dict(self._timeouts)
+        return {
+            model: {
+                "count": len(samples),
+                "p50": samples[len(samples) // 2],
+                "p90": samples[min(len(samples) - 1, int(0.9 * len(samples)))],
+                "timeouts": timeouts.get(model, 0),
+            }
+            for model, samples in models.items() if samples
+        }
+
+
+_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Process-wide tracker, so every agent adapts to the same observations."""
+    return _tracker
+
+
+class ModelTierPolicy:
+    """Chooses which model(s) to try for each stage, and with what timeout."""
+
+    def __init__(
+        self,
+        stage_models: Optional[Dict[str, str]] = None,
+        stage_timeouts: Optional[Dict[str, float]] = None,
+        fallback_model: str = FAST_MODEL,
+        tracker: Optional[LatencyTracker] = None
+    ):
+        self.stage_models = {**DEFAULT_STAGE_MODELS, **(stage_models or {})}
+        self.stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self.fallback_model = fallback_model
+        self.tracker = tracker or get_latency_tracker()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = {}
+
+    def attempts(self, stage: str) -> List[Tuple[str, float]]:
+        """Ordered (model, timeout) pairs to try for one call of `stage`."""
+        primary = self.stage_models.get(stage, self.stage_models["answer"])
+        timeout = self.stage_timeouts.get(stage, FALLBACK_TIMEOUT)
+        if primary == self.fallback_model:
+            return [(primary, FALLBACK_TIMEOUT)]
+
+        with self._lock:
+            self._calls[stage] = self._calls.get(stage, 0) + 1
+            probe = self._calls[stage] % PROBE_INTERVAL == 0
+
+        p90 = self.tracker.percentile(primary, 90)
+        if p90 is not None and p90 > timeout and not probe:
+            # Primary is currently too slow for this stage; go straight to the fast tier
+            return [(self.fallback_model, FALLBACK_TIMEOUT)]
+        return [(primary, timeout), (self.fallback_model, FALLBACK_TIMEOUT)]
@@ -0,0 +1,108 @@
+# FILE: rag/topics.py
+"""
+Topic tags for KEITH Handbook chunks.
+Chunks are tagged at index time from a fixed keyword table. The planner
+names topics in its own words ("FMLA", "tardy", "benefits"), which are
+normalized to the same tags and pushed down to the vector query as a
+filter. Chunks no keyword matches are stored as UNTAGGED and included in
+every filtered search. Bump indexer.INDEX_SCHEMA_VERSION whenever this
+table changes, so stored tags are rebuilt.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# tag -> words or phrases that mark a chunk (or a planner topic) as about it
+TOPIC_KEYWORDS: Dict[str, List[str]] = {
+    "vacation": [
+        "vacation", "pto", "paid time off", "paid time-off", "time-off", "time off", "accrual",
+        "accrue", "carryover", "cash out", "paid out",
+    ],
+    "sick": ["sick", "illness", "oregon sick time"],
+    "holidays": ["holiday", "holidays", "floating holiday"],
+    "leave": [
+        "leave", "fmla", "ofla", "paid leave oregon", "family medical", "bereavement",
+        "jury duty", "military", "maternity", "paternity", "parental",
+    ],
+    "benefits": [
+        "benefit", "benefits", "insurance", "health", "medical", "dental", "vision",
+        "401k", "401(k)", "retirement", "eap", "life insurance", "disability",
+    ],
+    "attendance": ["attendance", "tardy", "tardies", "tardiness", "late", "absence", "absent", "call in", "no call"],
+    "pay": ["pay", "payroll", "paycheck", "wage", "overtime", "bonus", "direct deposit", "timecard", "time clock"],
+    "conduct": [
+        "conduct", "dress code", "harassment", "discrimination", "discipline", "drug", "alcohol",
+        "smoking", "tobacco", "cell phone", "phones", "confidential", "violence", "ethics",
+        "bullying", "retaliation", "internet", "email", "parking",
+    ],
+    "safety": ["safety", "injury", "injuries", "accident", "ppe", "workers comp", "workman's comp", "emergency"],
+    "employment": [
+        "at-will", "at will", "equal employment", "onboarding", "probation", "introductory",
+        "transfer", "promotion", "termination", "resign", "resignation", "employment categories",
+        "full-time", "part-time", "background check", "immigration", "employment ends",
+        "final paycheck", "job abandonment", "internal transfers", "internal candidates",
+        "open positions", "exempt", "employment eligibility",
+    ],
+    "company": [
+        "leadership team", "mission", "one keith", "history", "values", "ceo", "strategy",
+        "keith promise", "walking floor", "company goals", "goal", "headquarters",
+    ],
+}
+TOPIC_TAGS = tuple(TOPIC_KEYWORDS)
+# Stored on chunks no topic matches; never offered to the planner
+UNTAGGED = "untagged"
+STORED_TAGS = TOPIC_TAGS + (UNTAGGED,)
+
+# Keyword hits a chunk needs (title hits count double) to carry a tag
+MIN_TAG_SCORE = 2
+
+_PATTERNS = {
+    tag: [re.compile(r"\b" + re.escape(word) + r"\b") for word in words]
+    for tag, words in TOPIC_KEYWORDS.items()
+}
+
+
+def _hits(tag: str, text: str) -> int:
+    return sum(len(pattern.findall(text)) for pattern in _PATTERNS[tag])
+
+
+def tag_chunk(text: str, section_title: str = "") -> List[str]:
+    """Topic tags for one chunk, in TOPIC_TAGS order ([UNTAGGED] if none match)."""
+    text = text.lower()
+    title = (section_title or "").lower()
+    tags = [
+        tag for tag in TOPIC_TAGS
+        if 2 * _hits(tag, title) + _hits(tag, text) >= MIN_TAG_SCORE
+    ]
+    return tags or [UNTAGGED]
+
+
+def filter_tags(topics: Iterable[str]) -> List[str]:
+    """Stored tags a search restricted to `topics` must match (untagged chunks always do)."""
+    tags = [tag for tag in topics if tag != UNTAGGED]
+    return tags + [UNTAGGED]
+
+
+def normalize_topic(name: str) -> Optional[str]:
+    """Map a free-form topic ("FMLA", "Tardy policy") to a tag, or None."""
+    name = str(name).lower().strip()
+    if name in TOPIC_KEYWORDS:
+        return name
+    scores = {tag: _hits(tag, name) for tag in TOPIC_TAGS}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else None
+
+
+def normalize_topics(names: Iterable[str]) -> List[str]:
+    """Distinct tags for a planner's topic list, dropping unknown names."""
+    tags = []
+    for name in names or []:
+        tag = normalize_topic(name)
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def section_tag(section_title: str) -> str:
+    """Normalized section tag ("Cell Phone Policy" -> "cell-phone-policy")."""
+    return re.sub(r"[^a-z0-9]+", "-", (section_title or "").lower()).strip("-")
@@ -0,0 +1,150 @@
+# FILE: rag/verifier.py
+"""
+Local answer verifier for KEITH Handbook Assistant.
+Checks the parts of an answer the LLM critique mostly spends its time on:
+page citations must point at retrieved pages, quantities (hours, days,
+percentages, dollar amounts) must appear in the retrieved text, the
+question or the policy facts the answer prompt states, or be the result of
+arithmetic shown in the answer, and that arithmetic must be right.
+Hour amounts next to a capped balance must not exceed the cap. The LLM
+critique only runs when something here looks suspicious.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Set
+
+from .prompts import ANSWER_SYSTEM_PROMPT
+
+# Hour balances that can never be exceeded (sentence mentions the keyword)
+POLICY_CAPS = (
+    ("vacation", 240.0, "the 240-hour vacation cap (20+ years)"),
+    ("sick", 40.0, "the 40-hour yearly sick time cap"),
+    ("personal unpaid", 80.0, "the 80 hours of Personal Unpaid Time"),
+)
+# Chunks can spill across a page break, so a neighbouring page is accepted
+PAGE_TOLERANCE = 1
+ARITHMETIC_TOLERANCE = 0.01
+
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+_NUMBER_RE = re.compile(_NUMBER)
+_QUANTITY_RE = re.compile(
+    rf"(\$\s?)?({_NUMBER})\s*(%|percent\b|hours?\b|hrs?\b|days?\b|weeks?\b|months?\b)",
+    re.IGNORECASE
+)
+_PAGE_RE = re.compile(rf"\bpages?\s+({_NUMBER})(?:\s*(?:-|–|to|and)\s*({_NUMBER}))?", re.IGNORECASE)
+# Either operand may carry a unit ("3.08 hours x 26 = 80.08 hours")
+_UNIT = r"(?:\s*(?:hours?|hrs?|days?|weeks?|months?|years?|pay periods?)\b)?"
+_ARITHMETIC_RE = re.compile(
+    rf"\$?({_NUMBER}){_UNIT}\s*(%\s*of|[+\-−x×*/÷])\s*\$?({_NUMBER}){_UNIT}\s*=\s*\$?({_NUMBER})",
+    re.IGNORECASE
+)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class Verification(NamedTuple):
+    ok: bool
+    issues: List[str]
+    checked: int
+
+
+def _value(text: str) -> float:
+    return round(float(text.replace(",", "")), 2)
+
+
+def _numbers(text: str) -> Set[float]:
+    return {_value(n) for n in _NUMBER_RE.findall(text)}
+
+
+# The answer prompt states these policy facts directly, so the model may quote them
+POLICY_NUMBERS = _numbers(ANSWER_SYSTEM_PROMPT)
+POLICY_PAGES = {int(v) for v in _numbers(" ".join(m.group(0) for m in _PAGE_RE.finditer(ANSWER_SYSTEM_PROMPT)))}
+
+
+def _apply(a: float, op: str, b: float) -> float:
+    op = op.lower().replace(" ", "")
+    if op == "%of":
+        return a / 100 * b
+    if op == "+":
+        return a + b
+    if op in ("-", "−"):
+        return a - b
+    if op in ("x", "×", "*"):
+        return a * b
+    return a / b if b else float("nan")
+
+
+def check_arithmetic(answer: str) -> tuple:
+    """(issues, results) for every "a op b = c" in the answer."""
+    issues, results = [], set()
+    for match in _ARITHMETIC_RE.finditer(answer):
+        a, op, b, stated = match.groups()
+        expected = _apply(_value(a), op, _value(b))
+        stated_value = _value(stated)
+        if abs(expected - stated_value) > max(ARITHMETIC_TOLERANCE * abs(expected), 0.01):
+            issues.append(f"Arithmetic '{match.group(0).strip()}' should give {expected:.2f}")
+        else:
+            results.add(stated_value)
+    return issues, results
+
+
+def check_citations(answer: str, context: List[Dict]) -> tuple:
+    """(issues, count) for "Page N" citations that match no retrieved page."""
+    pages = {int(c.get("page_number") or 0) for c in context} | POLICY_PAGES
+    issues, count = [], 0
+    for match in _PAGE_RE.finditer(answer):
+        for cited in match.groups():
+            if cited is None:
+                continue
+            count += 1
+            page = int(_value(cited))
+            if not any(abs(page - p) <= PAGE_TOLERANCE for p in pages):
+                issues.append(f"Cites page {page}, which is not among the retrieved pages")
+    return issues, count
+
+
+def check_caps(answer: str) -> List[str]:
+    """Hour amounts above a hard cap in a sentence about that balance."""
+    issues = []
+    for sentence in _SENTENCE_RE.split(answer):
+        lowered = sentence.lower()
+        hours = [
+            _value(m.group(2)) for m in _QUANTITY_RE.finditer(sentence)
+            if m.group(3).lower().startswith(("hour", "hr"))
+        ]
+        for keyword, cap, label in POLICY_CAPS:
+            if keyword in lowered:
+                for value in hours:
+                    if value > cap:
+                        issues.append(f"{value:g} hours exceeds {label}")
+    return issues
+
+
+def verify_answer(answer: str, context: List[Dict], question: str = "") -> Verification:
+    """
+    Check an answer's numbers and citations against the retrieved chunks.
+
+    Args:
+        answer: Generated answer
+        context: Chunks the answer was generated from
+        question: The question (numbers the employee gave are grounded)
+
+    Returns:
+        Verification; ok is False when anything needs an LLM review
+    """
+    issues, derived = check_arithmetic(answer)
+    citation_issues, citations = check_citations(answer, context)
+    issues += citation_issues
+    issues += check_caps(answer)
+
+    grounded = POLICY_NUMBERS | _numbers(question) | derived
+    for chunk in context:
+        grounded |= _numbers(chunk.get("text", ""))
+
+    quantities = 0
+    for match in _QUANTITY_RE.finditer(answer):
+        quantities += 1
+        value = _value(match.group(2))
+        if value not in grounded:
+            issues.append(f"'{match.group(0).strip()}' is not found in the handbook context")
+
+    return Verification(ok=not issues, issues=issues, checked=quantities + citations)
@@ -0,0 +1,175 @@
+# FILE: rag/warmup.py
+"""
+Process-level warm-up for KEITH Handbook Assistant.
+Checks (or builds) the index and constructs one shared AgenticRAG in a
+background thread at server start. Every session waits on the same
+readiness future instead of repeating the work. Once the agent is ready,
+answers to popular questions are precomputed for the current index.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from .agent import AgenticRAG
+from .indexer import (
+    check_index_exists,
+    default_checkpoint_path,
+    index_fingerprint,
+    index_handbook,
+    load_or_build_local_index,
+    versioned_namespace
+)
+from .precomputed import (
+    ANSWERS_PATH_ENV,
+    DEFAULT_ANSWERS_PATH,
+    PrecomputedAnswers,
+    popular_questions,
+    warm_precomputed_answers
+)
+from .query_log import get_query_log
+from .ratelimit import PRIORITY_BACKGROUND
+
+# Logged questions asked at least this often join the precomputed list
+POPULAR_MIN_COUNT = 3
+POPULAR_FROM_LOG = 20
+
+DEFAULT_NAMESPACE = "keith-handbook-jan2025"
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-warmup")
+_precompute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-precompute")
+_lock = threading.Lock()
+_futures: Dict[Tuple[str, str], Future] = {}
+_stages: Dict[Tuple[str, str], str] = {}
+
+
+def _warm(
+    key: Tuple[str, str],
+    openai_api_key: str,
+    pinecone_api_key: str,
+    index_name: str,
+    namespace: str,
+    local_index_dir: Optional[str],
+    precompute: bool,
+    agent_kwargs: dict
+) -> AgenticRAG:
+    _stages[key] = "🔍 Checking index status..."
+    namespace = versioned_namespace(namespace)
+    checkpoint = default_checkpoint_path()
+    if not check_index_exists(
+        api_key=pinecone_api_key,
+        index_name=index_name,
+        namespace=namespace,
+        checkpoint_path=checkpoint
+    ):
+        _stages[key] = "📚 First-time setup: Indexing KEITH Handbook..."
+        # Resumes from the checkpoint if an earlier run was interrupted
+        index_handbook(
+            openai_api_key=openai_api_key,
+            pinecone_api_key=pinecone_api_key,
+            index_name=index_name,
+            namespace=namespace,
+            checkpoint_path=checkpoint,
+            progress=lambda counts: _stages.__setitem__(
+                key, f"📚 First-time setup: Indexing KEITH Handbook ({counts['upserted']} chunks done)..."
+            )
+        )
+    
+    if local_index_dir:
+        _stages[key] = "🗂️ Loading local vector index..."
+        agent_kwargs = {
+            **agent_kwargs,
+            "local_index": load_or_build_local_index(openai_api_key, local_index_dir)
+        }
+    
+    answers_path = os.environ.get(ANSWERS_PATH_ENV, DEFAULT_ANSWERS_PATH)
+    if answers_path and "precomputed" not in agent_kwargs:
+        agent_kwargs = {
+            **agent_kwargs,
+            "precomputed": PrecomputedAnswers.load(answers_path, index_fingerprint())
+        }
+    
+    _stages[key] = "🤖 Initializing AI assistant..."
+    agent = AgenticRAG(
+        openai_api_key=openai_api_key,
+        pinecone_api_key=pinecone_api_key,
+        index_name=index_name,
+        namespace=namespace,
+        **agent_kwargs
+    )
+    
+    store = agent.precomputed
+    log = get_query_log()
+    questions = popular_questions(
+        q for q, _ in (log.top_questions(POPULAR_FROM_LOG, min_count=POPULAR_MIN_COUNT) if log else [])
+    )
+    if precompute and answers_path and store is not None and any(q not in store for q in questions):
+        # Runs after readiness behind real users' calls; stored answers get the
+        # synchronous critique, warming is kept out of the query log it is
+        # partly derived from, and users never join its low-priority runs
+        warm_agent = AgenticRAG(
+            openai_api_key=openai_api_key,
+            pinecone_api_key=pinecone_api_key,
+            index_name=index_name,
+            namespace=namespace,
+            **{
+                **agent_kwargs,
+                "critique_mode": "sync",
+                "precomputed": None,
+                "use_query_log": False,
+                "priority": PRIORITY_BACKGROUND,
+                "coalesce": False
+            }
+        )
+        _precompute_executor.submit(warm_precomputed_answers, warm_agent, store, questions, answers_path)
+    
+    _stages[key] = ""
+    return agent
+
+
+def start_warmup(
+    openai_api_key: str,
+    pinecone_api_key: str,
+    index_name: str,
+    namespace: str,
+    local_index_dir: Optional[str] = None,
+    precompute: bool = True,
+    **agent_kwargs
+) -> Future:
+    """
+    Start warm-up for an index/namespace, or return the one already started.
+    
+    Idempotent under concurrent callers. A failed warm-up is retried by the
+    next call; a running or successful one is shared.
+    
+    Args:
+        openai_api_key: OpenAI API key
+        pinecone_api_key: Pinecone API key
+        index_name: Pinecone index name
+        namespace: Base namespace; the index fingerprint is appended to it
+        local_index_dir: Serve queries from an int8 local index kept here
+        precompute: Precompute popular answers in the background once ready
+            (for long-running servers; short CLI runs should pass False)
+        **agent_kwargs: Extra AgenticRAG constructor arguments
+        
+    Returns:
+        Future resolving to the shared AgenticRAG
+    """
+    key = (index_name, namespace)
+    with _lock:
+        future = _futures.get(key)
+        if future is not None and not (future.done() and future.exception() is not None):
+            return future
+        
+        future = _executor.submit(
+            _warm, key, openai_api_key, pinecone_api_key, index_name, namespace,
+            local_index_dir, precompute, agent_kwargs
+        )
+        _futures[key] = future
+        return future
+
+
+def warmup_stage(index_name: str, namespace: str) -> str:
+    """Human-readable stage of a running warm-up ("" when idle or done)."""
+    return _stages.get((index_name, namespace), "")
@@ -8,9 +8,11 @@ No upload required - handbook is pre-indexed.
 
 import streamlit as st
 import os
+import queue
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-from rag.agent import AgenticRAG
-from rag.indexer import check_index_exists, index_handbook
+from rag.memory import ConversationMemory
+from rag.warmup import start_warmup, warmup_stage
 
 # Page configuration
 st.set_page_config(
@@ -75,6 +77,9 @@ st.markdown("""
 
 # Constants
 PINECONE_NAMESPACE = "keith-handbook-jan2025"
+CHAT_WINDOW = 20  # messages rendered on every rerun; older ones are behind a toggle
+REVIEW_POLL_SECONDS = 2  # how often pending background critiques are checked
+SUGGESTION_CHIPS = 4  # instant (precomputed) questions offered on an empty chat
 
 
 def init_session_state():
@@ -86,10 +91,17 @@ def init_session_state():
         "sources_used": [],
         "reasoning_steps": [],
         "status": "",
+        "memory": None,
+        "review_mailbox": None,
     }
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
+    if st.session_state.memory is None:
+        st.session_state.memory = ConversationMemory()
+    if st.session_state.review_mailbox is None:
+        # Plain queue: review callbacks run on worker threads without a script context
+        st.session_state.review_mailbox = queue.Queue()
 
 
 def check_secrets() -> tuple[bool, list[str]]:
@@ -107,40 +119,36 @@ def update_status(message: str):
     st.session_state.status = message
 
 
+def start_shared_warmup():
+    """Kick off (or join) the process-wide warm-up; cheap and idempotent."""
+    return start_warmup(
+        openai_api_key=st.secrets["OPENAI_API_KEY"],
+        pinecone_api_key=st.secrets["PINECONE_API_KEY"],
+        index_name=st.secrets["PINECONE_INDEX_NAME"],
+        namespace=PINECONE_NAMESPACE,
+        critique_mode="async"
+    )
+
+
 def initialize_system():
-    """Initialize the RAG system - check/create index and agent."""
+    """Attach this session to the shared agent once warm-up is ready."""
     if st.session_state.agent is not None:
         return True
     
+    future = start_shared_warmup()
+    stage_placeholder = st.empty()
     try:
-        # Check if handbook is already indexed
-        update_status("🔍 Checking index status...")
-        
-        is_indexed = check_index_exists(
-            api_key=st.secrets["PINECONE_API_KEY"],
-            index_name=st.secrets["PINECONE_INDEX_NAME"],
-            namespace=PINECONE_NAMESPACE
-        )
-        
-        if not is_indexed:
-            update_status("📚 First-time setup: Indexing KEITH Handbook...")
-            index_handbook(
-                openai_api_key=st.secrets["OPENAI_API_KEY"],
-                pinecone_api_key=st.secrets["PINECONE_API_KEY"],
-                index_name=st.secrets["PINECONE_INDEX_NAME"],
-                namespace=PINECONE_NAMESPACE
-            )
-        
-        # Initialize agent
-        update_status("🤖 Initializing AI assistant...")
-        st.session_state.agent = AgenticRAG(
-            openai_api_key=st.secrets["OPENAI_API_KEY"],
-            pinecone_api_key=st.secrets["PINECONE_API_KEY"],
-            index_name=st.secrets["PINECONE_INDEX_NAME"],
-            namespace=PINECONE_NAMESPACE,
-            status_callback=update_status
-        )
+        while not future.done():
+            stage = warmup_stage(st.secrets["PINECONE_INDEX_NAME"], PINECONE_NAMESPACE)
+            if stage:
+                stage_placeholder.info(stage)
+            try:
+                future.result(timeout=0.5)
+            except FutureTimeoutError:
+                pass
         
+        stage_placeholder.empty()
+        st.session_state.agent = future.result()
         st.session_state.indexed = True
         update_status("")
         return True
@@ -156,6 +164,95 @@ def reset_chat():
     st.session_state.messages = []
     st.session_state.sources_used = []
     st.session_state.reasoning_steps = []
+    st.session_state.memory = ConversationMemory()
+
+
+def render_messages(messages: list[dict]):
+    """Render a slice of the chat history."""
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if message.get("amended"):
+                st.caption("✏️ Amended after review")
+            elif message.get("review_id"):
+                st.caption("🔎 Double-checking this answer...")
+
+
+def render_suggestions() -> str | None:
+    """Chips for popular questions with precomputed answers; returns the one clicked."""
+    agent = st.session_state.agent
+    if agent is None or agent.precomputed is None:
+        return None
+    questions = agent.precomputed.questions()[:SUGGESTION_CHIPS]
+    if not questions:
+        return None
+    
+    st.caption("⚡ Popular questions (instant answers)")
+    clicked = None
+    for col, question in zip(st.columns(len(questions)), questions):
+        with col:
+            if st.button(question, key=f"suggestion_{question}", use_container_width=True):
+                clicked = question
+    return clicked
+
+
+def apply_review_updates() -> bool:
+    """Patch messages whose background review finished; True if anything changed."""
+    mailbox = st.session_state.review_mailbox
+    changed = False
+    while True:
+        try:
+            update = mailbox.get_nowait()
+        except queue.Empty:
+            return changed
+        
+        for i, message in enumerate(st.session_state.messages):
+            if message.get("review_id") != update["review_id"]:
+                continue
+            message.pop("review_id")
+            if update.get("amended"):
+                st.session_state.memory.amend_answer(message["content"], update["answer"])
+                message["content"] = update["answer"]
+                message["amended"] = True
+                if i == len(st.session_state.messages) - 1:
+                    st.session_state.reasoning_steps += update.get("reasoning_steps", [])
+            changed = True
+
+
+@st.fragment(run_every=REVIEW_POLL_SECONDS)
+def poll_reviews():
+    """Re-render the chat once a pending review lands."""
+    if apply_review_updates():
+        st.rerun(scope="app")
+
+
+def answer_with_live_status(prompt: str) -> tuple[str, str | None]:
+    """Run the agent with stage progress streamed into an st.status box."""
+    if not st.session_state.agent:
+        return "The assistant is not ready yet. Please try again in a moment.", None
+    
+    with st.status("🧠 Thinking...", expanded=False) as status_box:
+        def on_status(message: str):
+            if message:
+                status_box.update(label=message)
+                status_box.write(message)
+        
+        try:
+            result = st.session_state.agent.answer(
+                prompt,
+                memory=st.session_state.memory,
+                status_callback=on_status,
+                review_callback=st.session_state.review_mailbox.put
+            )
+        except Exception as e:
+            status_box.update(label="❌ Error", state="error")
+            return f"Sorry, I encountered an error: {str(e)}. Please try again.", None
+        
+        status_box.update(label="✅ Answer ready", state="complete")
+    
+    st.session_state.sources_used = result.get("sources", [])
+    st.session_state.reasoning_steps = result.get("reasoning_steps", [])
+    return result["answer"], result.get("review_id")
 
 
 def main():
@@ -184,6 +281,9 @@ def main():
         """)
         return
     
+    # Warm-up is shared by every session; the first page load after boot starts it
+    start_shared_warmup()
+    
     # Initialize system
     if not st.session_state.indexed:
         with st.spinner("Setting up KEITH Handbook Assistant..."):
@@ -231,38 +331,38 @@ def main():
                 *Ask me a question to get started!*
                 """)
             
-            # Display chat history
-            for message in st.session_state.messages:
-                with st.chat_message(message["role"]):
-                    st.markdown(message["content"])
+            # Display chat history (windowed so rerun cost doesn't grow with chat length)
+            messages = st.session_state.messages
+            hidden = max(0, len(messages) - CHAT_WINDOW)
+            if hidden and st.toggle(f"Show {hidden} earlier messages", key="show_earlier"):
+                render_messages(messages[:hidden])
+            render_messages(messages[hidden:])
+        
+        suggestion = render_suggestions() if not st.session_state.messages else None
         
         # Chat input
-        if prompt := st.chat_input("Ask a question about the KEITH Employee Handbook..."):
+        if prompt := st.chat_input("Ask a question about the KEITH Employee Handbook...") or suggestion:
             # Add user message
             st.session_state.messages.append({"role": "user", "content": prompt})
             
-            # Process with agent
-            if st.session_state.agent:
-                with st.spinner("Thinking..."):
-                    try:
-                        result = st.session_state.agent.answer(prompt)
-                        
-                        # Store results
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": result["answer"]
-                        })
-                        st.session_state.sources_used = result.get("sources", [])
-                        st.session_state.reasoning_steps = result.get("reasoning_steps", [])
-                        
-                    except Exception as e:
-                        error_msg = f"Sorry, I encountered an error: {str(e)}. Please try again."
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": error_msg
-                        })
+            # Render only the new turn; history above is already on screen
+            with chat_container:
+                render_messages([{"role": "user", "content": prompt}])
+                
+                with st.chat_message("assistant"):
+                    content, review_id = answer_with_live_status(prompt)
+                    st.markdown(content)
+                    if review_id:
+                        st.caption("🔎 Double-checking this answer...")
             
-            st.rerun()
+            message = {"role": "assistant", "content": content}
+            if review_id:
+                message["review_id"] = review_id
+            st.session_state.messages.append(message)
+        
+        # Answers are shown before their critique; patch them in when it finishes
+        if any(m.get("review_id") for m in st.session_state.messages):
+            poll_reviews()
     
     with info_col:
         # Sources Used
@@ -298,7 +398,17 @@ def main():
                         "generating": "✍️",
                         "self-critique": "🔎",
                         "critique-result": "✅",
+                        "verified": "☑️",
+                        "verification-flags": "🚩",
+                        "speculative-draft": "🚀",
                         "revision": "📝",
+                        "intent": "💬",
+                        "precomputed": "⚡",
+                        "topic-filter": "🏷️",
+                        "filter-fallback": "↩️",
+                        "fallback": "⏱️",
+                        "skipped": "⏭️",
+                        "reusing-context": "♻️",
                         "complete": "🎯",
                         "error": "❌"
                     }.get(step.get("type", ""), "▶️")
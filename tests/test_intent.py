@@ -0,0 +1,35 @@
+import pytest
+
+from rag.intent import GREETING, HANDBOOK, OFF_TOPIC, THANKS, IntentClassifier, misrouted_titles
+
+CLASSIFIER = IntentClassifier.train([])
+
+
+@pytest.mark.parametrize("question", [
+    "Who is the president of the company?",
+    "Can I get a restaurant reimbursement when traveling?",
+    "What is the weather closure procedure?",
+    "What is the stock purchase plan?",
+    "How do I translate my paycheck stub?",
+    "What game rules apply at the company picnic?",
+])
+def test_handbook_questions_sharing_an_off_topic_word(question):
+    assert CLASSIFIER.classify(question) == HANDBOOK
+
+
+@pytest.mark.parametrize("question, label", [
+    ("Hi there!", GREETING),
+    ("Thanks a lot", THANKS),
+    ("Tell me a joke", OFF_TOPIC),
+    ("What's the weather today?", OFF_TOPIC),
+])
+def test_small_talk_and_off_topic(question, label):
+    assert CLASSIFIER.classify(question) == label
+
+
+def test_follow_ups_are_never_off_topic():
+    assert CLASSIFIER.classify("Tell me a joke", allow_off_topic=False) == HANDBOOK
+
+
+def test_section_titles_route_to_handbook():
+    assert misrouted_titles(CLASSIFIER) == []
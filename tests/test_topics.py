@@ -0,0 +1,65 @@
+import numpy as np
+
+from rag.agent import MIN_FILTERED_RESULTS, filter_is_weak
+from rag.chunk_store import ChunkStore
+from rag.local_index import QuantizedIndex
+from rag.pdf import extract_pdf_chunks
+from rag.topics import UNTAGGED, tag_chunk
+
+CHUNKS = [
+    {"chunk_id": "best", "text": "Unused vacation is paid out", "page_number": 12,
+     "section_title": "If Your Employment Ends", "topics": ["pay"]},
+    {"chunk_id": "cover", "text": "KEITH Manufacturing Co.", "page_number": 1,
+     "section_title": "Page 1", "topics": [UNTAGGED]},
+    {"chunk_id": "accrual", "text": "Vacation accrues each pay period", "page_number": 11,
+     "section_title": "Vacation", "topics": ["vacation"]},
+    {"chunk_id": "cap", "text": "Vacation is capped at 150%", "page_number": 11,
+     "section_title": "Vacation", "topics": ["vacation"]},
+]
+VECTORS = np.array([
+    [1.0, 0.0, 0.0],
+    [0.6, 0.8, 0.0],
+    [0.5, 0.0, 0.87],
+    [0.4, 0.0, 0.92],
+])
+
+
+def _index():
+    return QuantizedIndex.build([c["chunk_id"] for c in CHUNKS], VECTORS), ChunkStore(CHUNKS)
+
+
+def test_every_handbook_chunk_is_tagged():
+    assert all(chunk["topics"] for chunk in extract_pdf_chunks())
+
+
+def test_vacation_payout_is_tagged_vacation_and_employment():
+    chunk = next(c for c in extract_pdf_chunks() if c["section_title"] == "If Your Employment Ends")
+    assert {"vacation", "employment"} <= set(chunk["topics"])
+
+
+def test_untagged_text():
+    assert tag_chunk("Revision Date - January 2025", "Page 1") == [UNTAGGED]
+
+
+def test_filtered_search_includes_untagged_chunks():
+    index, store = _index()
+    results = index.query([0.0, 1.0, 0.0], top_k=4, chunk_store=store, topics=["vacation"])
+    assert {r["chunk_id"] for r in results} == {"cover", "accrual", "cap"}
+
+
+def test_filter_that_drops_the_best_chunk_falls_back():
+    index, store = _index()
+    query = [1.0, 0.0, 0.0]
+    filtered = index.query(query, top_k=3, chunk_store=store, topics=["vacation"])
+    unfiltered = index.query(query, top_k=3, chunk_store=store)
+    assert "best" not in {r["chunk_id"] for r in filtered}
+    assert unfiltered[0]["chunk_id"] == "best"
+    assert filter_is_weak(filtered, unfiltered, MIN_FILTERED_RESULTS)
+
+
+def test_filter_keeps_results_as_good_as_unfiltered():
+    index, store = _index()
+    query = [0.4, 0.0, 0.92]
+    filtered = index.query(query, top_k=3, chunk_store=store, topics=["vacation"])
+    unfiltered = index.query(query, top_k=3, chunk_store=store)
+    assert not filter_is_weak(filtered, unfiltered, MIN_FILTERED_RESULTS)
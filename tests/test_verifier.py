@@ -0,0 +1,48 @@
+from rag.verifier import check_arithmetic, verify_answer
+
+CONTEXT = [{
+    "page_number": 18,
+    "text": "Years 1-3: 80 hours per year (3.08 hours per pay period). Maximum accrual 120 hours.",
+}]
+
+
+def test_units_on_both_operands():
+    issues, results = check_arithmetic("3.08 hours x 26 = 80.08 hours")
+    assert issues == []
+    assert results == {80.08}
+
+
+def test_units_on_first_operand_only():
+    issues, results = check_arithmetic("96 hours / 26 pay periods = 3.69")
+    assert issues == []
+    assert results == {3.69}
+
+
+def test_percent_of():
+    issues, results = check_arithmetic("150% of 80 hours = 120 hours")
+    assert issues == []
+    assert results == {120.0}
+
+
+def test_unicode_operators():
+    assert check_arithmetic("80 hours × 1.5 = 120 hours") == ([], {120.0})
+    assert check_arithmetic("120 hours − 40 hours = 80 hours") == ([], {80.0})
+
+
+def test_wrong_arithmetic_is_flagged():
+    issues, results = check_arithmetic("3.08 hours x 26 = 90 hours")
+    assert len(issues) == 1
+    assert results == set()
+
+
+def test_shown_calculation_grounds_its_result():
+    answer = "You accrue 3.08 hours per pay period, so 3.08 hours x 26 = 80.08 hours a year (Page 18)."
+    assert verify_answer(answer, CONTEXT).ok
+
+
+def test_cap_and_citation_violations_are_flagged():
+    answer = "You could reach 260 hours of vacation (Page 42)."
+    verification = verify_answer(answer, CONTEXT)
+    assert not verification.ok
+    assert any("240-hour" in issue for issue in verification.issues)
+    assert any("page 42" in issue for issue in verification.issues)